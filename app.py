@@ -2,6 +2,8 @@ import streamlit as st
 from PIL import Image
 import os
 
+from utils.instrumentation import debug_panel
+
 # ===== Page Config =====
 st.set_page_config(
     page_title="Rainfall Forecast Dashboard",
@@ -226,4 +228,6 @@ else:
         st.markdown("### Unknown Page ☔️")
         st.write("This page is not recognized. Please use the sidebar to navigate.")
 
-st.markdown('</div>', unsafe_allow_html=True)
\ No newline at end of file
+st.markdown('</div>', unsafe_allow_html=True)
+
+debug_panel()
\ No newline at end of file
@@ -0,0 +1,60 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from utils.backtest import CUTOFF_EVERY, HORIZON, MIN_HISTORY_YEARS, horizon_metrics, load_history, run_backtest
+from utils.model_registry import FEATURE_MODELS, available_models
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Rolling-origin backtest of the recursive forecast: error by horizon for every district and model.")
+    parser.add_argument("--models", nargs="+", choices=FEATURE_MODELS, help="models to backtest (default: all present)")
+    parser.add_argument("--horizon", type=int, default=HORIZON, help="months forecast from each cutoff")
+    parser.add_argument("--every", type=int, default=CUTOFF_EVERY, help="months between cutoffs")
+    parser.add_argument("--start", help="first cutoff month, e.g. 2000-01 (default: "
+                                        f"{MIN_HISTORY_YEARS} years after the data starts)")
+    parser.add_argument("--end", help="last cutoff month (default: the last one with a full horizon)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes for the cutoff chunks")
+    parser.add_argument("--noise", action="store_true",
+                        help="replay the dashboard's random perturbations (seeded) instead of the deterministic forecast")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write every (model, cutoff, district, horizon) row here (.parquet or .csv)")
+    parser.add_argument("--summary", help="write the per-horizon metrics here as CSV")
+    args = parser.parse_args()
+
+    models = available_models(args.models or FEATURE_MODELS)
+    if not models:
+        sys.exit("❌ None of the requested models has an artifact.")
+
+    history = load_history()
+    cutoffs = history.default_cutoffs(args.horizon, args.every)
+    if (args.start or args.end) and (len(cutoffs) or (args.start and args.end)):
+        start = pd.Timestamp(args.start) if args.start else cutoffs[0]
+        end = pd.Timestamp(args.end) if args.end else cutoffs[-1]
+        cutoffs = pd.date_range(start.to_period('M').to_timestamp(), end, freq=f"{args.every}MS")
+    if not len(cutoffs):
+        sys.exit("❌ No cutoffs in range; lower --horizon or widen --start/--end.")
+    print(f"📊 {len(cutoffs)} cutoffs ({cutoffs[0]:%Y-%m} to {cutoffs[-1]:%Y-%m}) x {len(history.pcodes)} districts "
+          f"x {', '.join(models)}, {args.horizon}-month horizon", file=sys.stderr)
+
+    start = time.perf_counter()
+    results = run_backtest(models, cutoffs, args.horizon, noise=args.noise, seed=args.seed, workers=args.workers,
+                           progress=lambda done, total: print(f"⏳ [{done}/{total}] chunks", file=sys.stderr))
+    print(f"✅ {len(results)} forecast points scored ({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+
+    summary = horizon_metrics(results)
+    if args.output:
+        if args.output.endswith(".parquet"):
+            results.to_parquet(args.output, index=False)
+        else:
+            results.to_csv(args.output, index=False)
+    if args.summary:
+        summary.to_csv(args.summary, index=False)
+
+    shown = sorted({h for h in (1, 3, 6, 12, 24, 60, 132) if h <= args.horizon} | {args.horizon})
+    table = summary[summary['horizon'].isin(shown)].pivot(index='horizon', columns='model', values='mae')
+    print("\nMAE (mm) by horizon (months ahead):")
+    print(table.round(2).to_string())
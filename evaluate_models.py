@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+
+import numpy as np
+
+from utils.evaluation import PROPHET_TEST_DATA, TEST_DATA, load_feature_test_data, load_prophet_test_data, regression_metrics
+from utils.model_formats import load_artifact
+from utils.model_registry import MODEL_FILES, available_models, model_path
+from utils.predictors import Predictor
+
+
+def _percentiles(samples):
+    samples = np.asarray(samples) * 1000
+    return {'p50_ms': float(np.percentile(samples, 50)), 'p95_ms': float(np.percentile(samples, 95))}
+
+
+def _time_calls(predict, inputs):
+    samples = []
+    for X in inputs:
+        start = time.perf_counter()
+        predict(X)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def evaluate_model(name, test_data=TEST_DATA, prophet_test_data=PROPHET_TEST_DATA, repeats=50, batch_size=256, seed=0):
+    """Accuracy and cost of one artifact; meant to run in a fresh process."""
+    rss_start = _rss_mb()
+    tracemalloc.start()
+
+    start = time.perf_counter()
+    model = load_artifact(model_path(name))
+    load_s = time.perf_counter() - start
+
+    if name == "Prophet":
+        df = load_prophet_test_data(prophet_test_data)
+        y_true = df['y'].to_numpy()
+        predict = lambda rows: model.predict(rows)['yhat'].to_numpy()
+        take = lambda idx: df.iloc[idx]
+        full_input = df
+        # Prophet's predict costs tens of milliseconds per call
+        repeats = min(repeats, 10)
+    else:
+        predictor = Predictor(model)
+        X, y_true = load_feature_test_data(predictor, test_data)
+        y_true = y_true.to_numpy()
+        predict = predictor.predict
+        take = lambda idx: X[idx]
+        full_input = X
+
+    start = time.perf_counter()
+    y_pred = predict(full_input)
+    full_s = time.perf_counter() - start
+    n = len(y_true)
+
+    rng = np.random.default_rng(seed)
+    rows = [take(rng.integers(0, n, 1)) for _ in range(repeats)]
+    batch = min(batch_size, n)
+    batches = [take(rng.integers(0, n, batch)) for _ in range(repeats)]
+    per_row = _time_calls(predict, rows)
+    per_batch = _time_calls(predict, batches)
+
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'artifact': model_path(name),
+        'artifact_bytes': os.path.getsize(model_path(name)),
+        'rows': n,
+        'metrics': regression_metrics(y_true, y_pred),
+        'load_s': load_s,
+        'latency_row': _percentiles(per_row),
+        'latency_batch': dict(_percentiles(per_batch), batch_size=batch),
+        'throughput_rows_per_s': n / full_s if full_s > 0 else None,
+        'batch_throughput_rows_per_s': batch / float(np.median(per_batch)),
+        'peak_python_alloc_mb': peak_traced / (1024 * 1024),
+        'peak_rss_mb': _rss_mb(),
+        'rss_growth_mb': _rss_mb() - rss_start,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark accuracy, latency and memory of every model artifact.")
+    parser.add_argument("--models", nargs="+", choices=list(MODEL_FILES), help="models to evaluate (default: all present)")
+    parser.add_argument("--test-data", default=TEST_DATA, help="feature test set (CSV or --all-districts panel directory)")
+    parser.add_argument("--prophet-test-data", default=PROPHET_TEST_DATA)
+    parser.add_argument("--repeats", type=int, default=50, help="timed calls per latency measurement")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'test_data': args.test_data,
+        'prophet_test_data': args.prophet_test_data,
+        'results': {},
+        'errors': {},
+    }
+    # One fresh process per model keeps load times and peak memory independent
+    for name in args.models or available_models():
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            future = pool.submit(evaluate_model, name, args.test_data, args.prophet_test_data, args.repeats, args.batch_size)
+            try:
+                report['results'][name] = future.result()
+                m = report['results'][name]['metrics']
+                print(f"✅ {name}: MAE {m['mae']:.2f} mm, RMSE {m['rmse']:.2f} mm", file=sys.stderr)
+            except Exception as e:
+                report['errors'][name] = repr(e)
+                print(f"⚠️ {name} failed: {e}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
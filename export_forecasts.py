@@ -0,0 +1,41 @@
+import argparse
+import os
+import sys
+import time
+
+from utils.bulk_export import FORMATS, export_forecasts
+from utils.data_store import load_rainfall
+from utils.district_index import load_index
+from utils.model_registry import FEATURE_MODELS, available_models
+
+MODELS = FEATURE_MODELS + ["Prophet", "SARIMA"]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export 2025–2035 forecasts of every district and model as Parquet or a zipped CSV.")
+    parser.add_argument("--format", choices=list(FORMATS), default="parquet")
+    parser.add_argument("--output", help="output file (default: rainfall_forecasts_2025_2035 + extension)")
+    parser.add_argument("--models", nargs="+", choices=MODELS, help="models to export (default: all present)")
+    parser.add_argument("--districts", nargs="+", help="districts to export (default: every district)")
+    parser.add_argument("--intervals", action="store_true", help="add 90%% Monte Carlo bounds for the feature models "
+                                                              "(200 paths per district; several times slower)")
+    args = parser.parse_args()
+
+    models = available_models(args.models or MODELS)
+    missing = sorted(set(args.models or []) - set(models))
+    if missing:
+        print(f"⚠️ No artifact for {', '.join(missing)}, skipping.", file=sys.stderr)
+    if not models:
+        sys.exit("❌ None of the requested models has an artifact.")
+
+    index = load_index()
+    unknown = [d for d in (args.districts or []) if d not in index]
+    if unknown:
+        sys.exit(f"❌ Unknown district(s): {', '.join(unknown)}")
+    output = args.output or f"rainfall_forecasts_2025_2035{FORMATS[args.format]}"
+
+    start = time.perf_counter()
+    rows = export_forecasts(load_rainfall(), index, models, output, args.format, args.districts, args.intervals,
+                            progress=lambda done, total: print(f"⏳ [{done}/{total}] districts", file=sys.stderr))
+    print(f"✅ {output}: {rows} rows for {', '.join(models)} ({os.path.getsize(output) / 1e6:.1f} MB, "
+          f"{time.perf_counter() - start:.1f}s)", file=sys.stderr)
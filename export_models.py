@@ -0,0 +1,56 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from utils.evaluation import TEST_DATA, read_test_data
+from utils.model_formats import COMPACT_FILES, export_model, load_artifact
+from utils.model_registry import FEATURE_MODELS, MODEL_DIR, MODEL_FILES, version_dir
+from utils.predictors import Predictor, resolve_features
+
+
+def _timed_load(path):
+    start = time.perf_counter()
+    model = load_artifact(path)
+    return model, time.perf_counter() - start
+
+
+def _size(path):
+    if not path.endswith(".npy"):
+        return os.path.getsize(path)
+    stem = os.path.splitext(path)[0]
+    return sum(os.path.getsize(p) for p in (path, stem + ".splits.npy", stem + ".json"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Write pickle-free copies of the feature models (UBJSON, LightGBM text, flat forest array).")
+    parser.add_argument("--version", help="model version to export (default: the shipped models in model/)")
+    parser.add_argument("--models", nargs="+", default=FEATURE_MODELS, choices=FEATURE_MODELS)
+    parser.add_argument("--test-data", default=TEST_DATA, help="rows used to check the exports predict the same")
+    args = parser.parse_args()
+
+    directory = version_dir(args.version) if args.version else MODEL_DIR
+    if not os.path.isdir(directory):
+        sys.exit(f"❌ No model directory {directory}")
+    test = read_test_data(args.test_data) if os.path.exists(args.test_data) else None
+
+    for name in args.models:
+        pickle_path = os.path.join(directory, MODEL_FILES[name])
+        if not os.path.exists(pickle_path):
+            print(f"⚠️ {name}: no {MODEL_FILES[name]} in {directory}, skipping", file=sys.stderr)
+            continue
+        model, pickle_s = _timed_load(pickle_path)
+        path = export_model(name, model, directory, resolve_features(model))
+        compact, compact_s = _timed_load(path)
+
+        if test is not None:
+            before, after = Predictor(model), Predictor(compact)
+            diff = np.max(np.abs(before.predict_frame(test) - after.predict_frame(test)))
+            check = f", max |Δ| {diff:.2e} on {len(test)} test rows"
+        else:
+            check = ""
+        print(f"✅ {name}: {COMPACT_FILES[name]} {_size(path) / 1e6:.2f} MB vs {os.path.getsize(pickle_path) / 1e6:.2f} MB, "
+              f"load {compact_s * 1000:.0f} ms vs {pickle_s * 1000:.0f} ms{check}", file=sys.stderr)
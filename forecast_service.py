@@ -0,0 +1,101 @@
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from utils.data_store import load_rainfall
+from utils.district_index import load_index
+from utils.forecast_batcher import ForecastBatcher
+from utils.model_registry import FEATURE_MODELS, available_models
+
+DEFAULT_MODELS = ["LightGBM"]
+
+
+class ForecastHandler(BaseHTTPRequestHandler):
+    """JSON API over the shared ``ForecastBatcher``.
+
+    GET  /health
+    GET  /districts
+    GET  /forecast?district=Dhaka&model=LightGBM&model=XGBoost
+    POST /forecast  {"districts": [...], "models": [...]}   (omit "districts" for all)
+    """
+
+    batcher = None
+    timeout_s = 600
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _forecast(self, districts, models):
+        models = models or DEFAULT_MODELS
+        unknown = [m for m in models if m not in available_models(FEATURE_MODELS)]
+        if unknown:
+            return self._send(400, {"error": f"Unknown model(s): {', '.join(unknown)}"})
+        try:
+            results = self.batcher.forecast(districts, models, timeout=self.timeout_s)
+        except KeyError as e:
+            return self._send(404, {"error": str(e.args[0])})
+        except Exception as e:
+            return self._send(500, {"error": f"{type(e).__name__}: {e}"})
+        self._send(200, {
+            "dates": [f"{d:%Y-%m-%d}" for d in self.batcher.future_dates],
+            "forecasts": {
+                # null for a district without any observed rainfall to start from
+                name: {district: None if values is None else [round(float(v), 4) for v in values]
+                       for district, values in by_district.items()}
+                for name, by_district in results.items()
+            },
+        })
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/health":
+            return self._send(200, {"status": "ok", "stats": dict(self.batcher.stats)})
+        if url.path == "/districts":
+            return self._send(200, {"districts": self.batcher.districts})
+        if url.path == "/forecast":
+            if "district" not in query:
+                return self._send(400, {"error": "Missing 'district' parameter"})
+            return self._forecast(query["district"], query.get("model"))
+        self._send(404, {"error": f"Unknown path {url.path}"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/forecast":
+            return self._send(404, {"error": f"Unknown path {self.path}"})
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except ValueError:
+            return self._send(400, {"error": "Body must be JSON"})
+        if not isinstance(request, dict):
+            return self._send(400, {"error": "Body must be a JSON object"})
+        for field in ("districts", "models"):
+            value = request.get(field)
+            if value is not None and not (isinstance(value, list) and all(isinstance(v, str) for v in value)):
+                return self._send(400, {"error": f"'{field}' must be a list of strings"})
+        self._forecast(request.get("districts") or self.batcher.districts, request.get("models"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local HTTP service for batched district rainfall forecasts.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--window-ms", type=float, default=20, help="how long to wait to coalesce concurrent requests")
+    parser.add_argument("--max-entries", type=int, default=4096, help="in-memory forecast cache size")
+    args = parser.parse_args()
+
+    ForecastHandler.batcher = ForecastBatcher(
+        load_rainfall(), window_s=args.window_ms / 1000, max_entries=args.max_entries, index=load_index(),
+        follow_data=True,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), ForecastHandler)
+    print(f"✅ Forecast service listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
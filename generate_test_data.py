@@ -1,97 +1,145 @@
+import argparse
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 
-# ====== Load rainfall dataset ======
-data = pd.read_csv("data/bgd-rainfall-adm2-full.csv", low_memory=False)
-
-# ====== Preprocessing ======
-data['date'] = pd.to_datetime(data['date'], errors='coerce')
-data['rfh'] = pd.to_numeric(data['rfh'], errors='coerce')
-data = data.dropna(subset=['date', 'rfh'])
-
-data['year'] = data['date'].dt.year
-data['month'] = data['date'].dt.month
-data['quarter'] = data['date'].dt.quarter
-data['is_monsoon'] = data['month'].apply(lambda x: 1 if x in [6, 7, 8, 9] else 0)
-
-# ====== Add season info ======
-season_mapping = {
-    12: "Winter", 1: "Winter", 2: "Winter",
-    3: "Summer", 4: "Summer", 5: "Summer",
-    6: "Monsoon", 7: "Monsoon", 8: "Monsoon", 9: "Monsoon",
-    10: "Post-Monsoon", 11: "Post-Monsoon"
-}
-data['season'] = data['month'].map(season_mapping)
-
-# ====== Lag, rolling, diff features ======
-data['rfh_lag1'] = data.groupby('ADM2_PCODE')['rfh'].shift(1)
-data['rfh_lag2'] = data.groupby('ADM2_PCODE')['rfh'].shift(2)
-data['rfh_roll3'] = data.groupby('ADM2_PCODE')['rfh'].rolling(3).mean().reset_index(0, drop=True)
-data['rfh_roll6'] = data.groupby('ADM2_PCODE')['rfh'].rolling(6).mean().reset_index(0, drop=True)
-data['rfh_diff'] = data.groupby('ADM2_PCODE')['rfh'].diff()
-
-# ====== Advanced Features ======
-data['sin_month'] = np.sin(2 * np.pi * data['month'] / 12)
-data['cos_month'] = np.cos(2 * np.pi * data['month'] / 12)
-data['month_avg_rfh'] = data.groupby('month')['rfh'].transform('mean')
-data['time_idx'] = range(len(data))
-
-# ====== Drop missing values ======
-data = data.dropna()
-
-# ====== One-hot encoding for season ======
-data = pd.get_dummies(data, columns=['season'], drop_first=True)
-
-# ====== Auto-select district with enough rows ======
-district_counts = data['ADM2_PCODE'].value_counts()
-selected_district = None
-
-for code, count in district_counts.items():
-    if count >= 100:
-        selected_district = code
-        break
-
-if not selected_district:
-    print("❌ No district has enough data after feature engineering.")
-    exit()
-
-data = data[data['ADM2_PCODE'] == selected_district]
-print(f"✅ Selected district: {selected_district} with {len(data)} rows")
-
-# ====== Ensure required season columns ======
-for col in ['season_Monsoon', 'season_Post-Monsoon', 'season_Summer']:
-    if col not in data.columns:
-        data[col] = 0
-
-# ====== Final 16 Features ======
-selected_features = [
-    'year', 'month', 'quarter', 'is_monsoon',
-    'rfh_lag1', 'rfh_lag2', 'rfh_roll3', 'rfh_roll6', 'rfh_diff',
-    'sin_month', 'cos_month', 'month_avg_rfh', 'time_idx',
-    'season_Monsoon', 'season_Post-Monsoon', 'season_Summer'
-]
-
-# ====== Ensure all features are string-named (for XGBoost) ======
-data.rename(columns={col: str(col) for col in data.columns}, inplace=True)
-selected_features = list(map(str, selected_features))
-
-X = data[selected_features]
-y = data['rfh']
-
-# ====== Train-Test Split ======
-if len(X) < 10:
-    print("⚠️ Not enough data to split. Saving all as test set.")
-    test_data = X.copy()
-    test_data['rfh'] = y
-    test_data['date'] = data['date'].values  # ✅ Needed for Prophet
-else:
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
-    test_data = X_test.copy()
-    test_data['rfh'] = y_test
-    test_data['date'] = data.loc[X_test.index, 'date']  # ✅ Add date for Prophet
-
-# ====== Save CSV ======
-test_data.to_csv("data/test_data.csv", index=False)
-print("✅ test_data.csv saved with 16 features + rfh + date.")
-print("📊 Features:", test_data.columns.tolist())
+from utils.features import (HISTORY_ROWS, MODEL_FEATURES, SELECTED_FEATURES, StreamingFeatureBuilder,
+                            clean_rainfall_rows, district_feature_frame, monthly_means)
+
+RAW_CSV = "data/bgd-rainfall-adm2-full.csv"
+PANEL_DIR = "data/test_panel"
+
+
+def generate_single_district_test_data(csv_path=RAW_CSV, output="data/test_data.csv"):
+    # ====== Load rainfall dataset ======
+    data = clean_rainfall_rows(pd.read_csv(csv_path, usecols=['date', 'ADM2_PCODE', 'rfh'],
+                                           dtype={'ADM2_PCODE': str}, low_memory=False))
+
+    # ====== Monthly climatology per district (month_avg_rfh) ======
+    month_avg = monthly_means([data])
+
+    # ====== Auto-select district with enough rows ======
+    selected_district = None
+    for code, count in data['ADM2_PCODE'].value_counts().items():
+        if count - HISTORY_ROWS >= 100:
+            selected_district = code
+            break
+
+    if not selected_district:
+        print("❌ No district has enough data after feature engineering.")
+        exit()
+
+    # ====== Shared feature definitions (utils/features.py) ======
+    rows = data[data['ADM2_PCODE'] == selected_district]
+    features = district_feature_frame(rows, month_avg[selected_district], SELECTED_FEATURES)
+    print(f"✅ Selected district: {selected_district} with {len(features)} rows")
+
+    X = features[SELECTED_FEATURES]
+    y = features['rfh']
+
+    # ====== Train-Test Split ======
+    if len(X) < 10:
+        print("⚠️ Not enough data to split. Saving all as test set.")
+        test_data = X.copy()
+        test_data['rfh'] = y
+        test_data['date'] = features['date'].values  # ✅ Needed for Prophet
+    else:
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
+        test_data = X_test.copy()
+        test_data['rfh'] = y_test
+        test_data['date'] = features.loc[X_test.index, 'date']  # ✅ Add date for Prophet
+
+    # ====== Save CSV ======
+    test_data.to_csv(output, index=False)
+    print(f"✅ {os.path.basename(output)} saved with 16 features + rfh + date.")
+    print("📊 Features:", test_data.columns.tolist())
+
+
+def _read_chunks(csv_path, chunksize):
+    reader = pd.read_csv(csv_path, usecols=['date', 'ADM2_PCODE', 'rfh'], dtype={'ADM2_PCODE': str},
+                         chunksize=chunksize, low_memory=False)
+    for chunk in reader:
+        yield clean_rainfall_rows(chunk)
+
+
+def stream_features(csv_path=RAW_CSV, output="data/rainfall_features.csv", chunksize=200_000):
+    """Feature table for every district, built chunk by chunk and appended to ``output``.
+
+    Uses feature version 2 (utils/features.py): ``month_avg_rfh`` is each
+    district's own calendar-month mean, not the all-district mean of the
+    shipped models.
+    """
+    # ====== Pass 1: per-district monthly climatology (month_avg_rfh) ======
+    month_avg = monthly_means(_read_chunks(csv_path, chunksize))
+
+    # ====== Pass 2: features per chunk, carrying each district's trailing window ======
+    builder = StreamingFeatureBuilder(month_avg)
+    if os.path.exists(output):
+        os.remove(output)
+    rows = 0
+    for i, chunk in enumerate(_read_chunks(csv_path, chunksize)):
+        features = builder.transform(chunk)
+        features.to_csv(output, mode='a', header=(rows == 0), index=False)
+        rows += len(features)
+        print(f"⏳ Chunk {i + 1}: {rows} feature rows written")
+
+    print(f"✅ {os.path.basename(output)} saved with {rows} rows for {len(builder.carry)} districts.")
+
+
+def _split_district(task):
+    code, rows, month_avg, output_dir, test_size = task
+    features = district_feature_frame(rows, month_avg, MODEL_FEATURES)
+    n_test = int(np.ceil(len(features) * test_size)) if len(features) >= 10 else len(features)
+    features['split'] = np.where(np.arange(len(features)) >= len(features) - n_test, 'test', 'train')
+
+    partition = os.path.join(output_dir, f"ADM2_PCODE={code}")
+    os.makedirs(partition, exist_ok=True)
+    features.to_parquet(os.path.join(partition, "part-0.parquet"), index=False)
+    return code, len(features) - n_test, n_test
+
+
+def generate_panel(csv_path=RAW_CSV, output_dir=PANEL_DIR, workers=None, test_size=0.2):
+    """Chronological train/test split for every district, as a Hive-partitioned Parquet dataset."""
+    data = clean_rainfall_rows(pd.read_csv(csv_path, usecols=['date', 'ADM2_PCODE', 'rfh'],
+                                           dtype={'ADM2_PCODE': str}, low_memory=False))
+    month_avg = monthly_means([data])
+
+    if os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+
+    tasks = ((code, rows, month_avg[code], output_dir, test_size) for code, rows in data.groupby('ADM2_PCODE', sort=False))
+    n_districts = n_train = n_test = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for code, train_rows, test_rows in pool.map(_split_district, tasks):
+            n_districts += 1
+            n_train += train_rows
+            n_test += test_rows
+            print(f"⏳ [{n_districts}] {code}: {train_rows} train / {test_rows} test rows")
+
+    print(f"✅ {output_dir} saved for {n_districts} districts ({n_train} train / {n_test} test rows).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the engineered-feature test data from the rainfall CSV.")
+    parser.add_argument("--input", default=RAW_CSV, help="rainfall CSV (HDX ADM2 export)")
+    parser.add_argument("--stream", action="store_true",
+                        help="process the CSV in chunks and write features for all districts incrementally")
+    parser.add_argument("--chunksize", type=int, default=200_000, help="rows per chunk in --stream mode")
+    parser.add_argument("--all-districts", action="store_true",
+                        help="write train/test splits for every district to a partitioned Parquet dataset")
+    parser.add_argument("--workers", type=int, help="processes for --all-districts (default: CPU count)")
+    parser.add_argument("--output", help="output path (default: data/test_data.csv, data/rainfall_features.csv "
+                                         "with --stream, data/test_panel with --all-districts)")
+    args = parser.parse_args()
+
+    if args.all_districts:
+        generate_panel(args.input, args.output or PANEL_DIR, args.workers)
+    elif args.stream:
+        stream_features(args.input, args.output or "data/rainfall_features.csv", args.chunksize)
+    else:
+        generate_single_district_test_data(args.input, args.output or "data/test_data.csv")
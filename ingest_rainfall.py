@@ -0,0 +1,41 @@
+import argparse
+import sys
+import time
+
+from utils.ingest import FEATURE_TABLE, check_batch, ingest, read_batch
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Append a batch of new dekadal/monthly rainfall rows to the dataset.")
+    parser.add_argument("batch", help="CSV (HDX layout: date, ADM2_PCODE, rfh, ...) or Parquet file of new rows")
+    parser.add_argument("--feature-table", default=FEATURE_TABLE, help="feature CSV to extend (skipped if missing)")
+    parser.add_argument("--dry-run", action="store_true", help="validate the batch without writing anything")
+    args = parser.parse_args()
+
+    try:
+        batch = read_batch(args.batch)
+    except (OSError, ValueError) as e:
+        sys.exit(f"❌ Could not read {args.batch}: {e}")
+
+    if args.dry_run:
+        errors = check_batch(batch)
+        for error in errors:
+            print(f"⚠️ {error}", file=sys.stderr)
+        if errors:
+            sys.exit(1)
+        print(f"✅ {len(batch)} rows are valid and can be appended.")
+        sys.exit(0)
+
+    start = time.perf_counter()
+    try:
+        summary = ingest(batch, feature_table=args.feature_table)
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
+    if not summary["rows"]:
+        print("ℹ️ The batch is empty; nothing to append.")
+    else:
+        print(f"✅ Appended {summary['rows']} rows for {summary['districts']} district(s), "
+              f"{summary['first_date']} to {summary['last_date']} ({time.perf_counter() - start:.2f}s)")
+        if summary["feature_rows"] is None:
+            print(f"ℹ️ {args.feature_table} not found; run generate_test_data.py --stream to build it.")
+        else:
+            print(f"📊 {summary['feature_rows']} feature rows appended to {args.feature_table}")
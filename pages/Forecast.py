@@ -1,11 +1,19 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import joblib
-import geopandas as gpd
 import plotly.express as px
-from datetime import datetime, timedelta
-from sklearn.metrics import mean_absolute_error, mean_squared_error
+import plotly.graph_objects as go
+import os
+
+from utils.bulk_export import export_forecasts, export_path
+from utils.data_store import data_version, list_districts, load_rainfall
+from utils.district_index import load_index
+from utils.forecast_cache import ForecastCache, file_hash, history_hash
+from utils.forecast_engine import FORECAST_DATES, build_state, prediction_interval, recursive_forecast
+from utils.instrumentation import count, debug_panel, timed, track_cache
+from utils.model_registry import (FEATURE_MODELS, available_models, district_model_path, get_predictor, load_many,
+                                  model_path)
+from utils.prophet_runner import artifact_forecast, district_forecast, predictions_for
+from utils.sarima import forecast as sarima_forecast, read_spec
 
 # 💅 CSS
 st.markdown("""
@@ -72,176 +80,179 @@ st.markdown('<div class="title">🌧️ Rainfall Forecast Dashboard</div>', unsa
 col1, col2 = st.columns([1, 1])
 with col1:
     # <!-- DESIGN: District Selection Dropdown -->
-    @st.cache_data
-    def load_districts():
+    # Keyed on the data version so an ingest or a replaced CSV is picked up
+    @track_cache(st.cache_data)
+    def load_districts(version):
         try:
-            df = pd.read_csv("data/bgd-rainfall-adm2-full.csv")
-            if "ADM2_EN" not in df.columns:
-                gdf = gpd.read_file("data/adm2Shape/bgd_admbnda_adm2_bbs_20201113.shp")
-                df = df.merge(gdf[['ADM2_PCODE', 'ADM2_EN']], on='ADM2_PCODE', how='left')
-            return sorted(df['ADM2_EN'].dropna().unique())
+            return list_districts()
         except Exception as e:
             st.error(f"Error loading districts: {e}")
             return []
-    districts = load_districts()
+    districts = load_districts(data_version())
     district = st.selectbox("🌍 Select District", districts, index=districts.index("Dhaka") if "Dhaka" in districts else 0)
 with col2:
     # <!-- DESIGN: Model Selection Multiselect -->
-    @st.cache_resource
-    def load_models():
-        try:
-            model_paths = {
-                "XGBoost": "xgb_model.pkl",
-                "Random Forest": "rf_model.pkl",
-                "LightGBM": "lgbm_model.pkl"
-            }
-            models = {}
-            for name, path in model_paths.items():
-                try:
-                    model = joblib.load(f"model/{path}")
-                    models[name] = model
-                except Exception as e:
-                    st.warning(f"Model {name} not found at {path}: {e}")
-            return models
-        except Exception as e:
-            st.error(f"Error loading models: {e}")
-            return {}
-    models = load_models()
+    # Only the artifact files are checked here; models are loaded once selected
+    model_names = available_models(FEATURE_MODELS + ["Prophet", "SARIMA"])
     # Ensure default value exists in options
-    default_models = ["LightGBM"] if "LightGBM" in models else []
-    selected_models = st.multiselect("🧠 Choose Models", list(models.keys()), default=default_models)
+    default_models = ["LightGBM"] if "LightGBM" in model_names else []
+    selected_models = st.multiselect("🧠 Choose Models", model_names, default=default_models)
+
+show_intervals = st.checkbox("📊 Show 90% prediction interval (Monte Carlo ensemble)")
 
 if not selected_models:
     st.warning("⚠️ Please select at least one model to continue.")
     st.stop()
 
+# Load the selected models concurrently (shared across pages and sessions)
+# Prophet is served from precomputed forecasts (see run_prophet.py) and SARIMA from
+# per-district parameters (see train_models.py); neither is loaded here
+DISTRICT_SERVED = ["Prophet", "SARIMA"]
+models, load_errors = load_many([name for name in selected_models if name not in DISTRICT_SERVED], loader=get_predictor)
+for name, e in load_errors.items():
+    st.warning(f"Model {name} could not be loaded from {model_path(name)}: {e}")
+selected_models = [name for name in selected_models if name in models or name in DISTRICT_SERVED]
+
 # <!-- DESIGN: Data Loading and Processing -->
-@st.cache_data
-def load_historical_data():
+@track_cache(st.cache_resource)
+def load_historical_data(version):
+    # Full sorted store plus its district index; rows without rainfall are skipped per district
     try:
-        df = pd.read_csv("data/bgd-rainfall-adm2-full.csv")
-        if "ADM2_EN" not in df.columns:
-            gdf = gpd.read_file("data/adm2Shape/bgd_admbnda_adm2_bbs_20201113.shp")
-            df = df.merge(gdf[['ADM2_PCODE', 'ADM2_EN']], on='ADM2_PCODE', how='left')
-        df['date'] = pd.to_datetime(df['date'], errors='coerce')
-        df['month'] = df['date'].dt.month
-        df['rfh'] = pd.to_numeric(df['rfh'], errors='coerce')
-        df = df.dropna(subset=['date', 'rfh', 'month'])
-        return df
+        return load_rainfall(), load_index()
     except Exception as e:
         st.error(f"Error loading historical data: {e}")
-        return pd.DataFrame()
+        return pd.DataFrame(), None
 
-def generate_recursive_features(historical_data, district, future_dates, model_features, model_name, model):
-    try:
-        last_values = historical_data[historical_data['ADM2_EN'] == district][['date', 'rfh', 'month']].sort_values('date').tail(6).copy()
-        if last_values.empty:
-            st.error(f"No historical data found for district {district}")
-            return pd.DataFrame()
-        forecast_values = []
-        month_avg_rfh = historical_data[historical_data['ADM2_EN'] == district].groupby('month')['rfh'].mean()
-        max_rainfall = month_avg_rfh.max()
-        month_weight = (month_avg_rfh / max_rainfall).to_dict() if not month_avg_rfh.empty else {}
-        alpha = 0.7
-        base_noise_std = 2.5 if model_name == "XGBoost" else 2.0
-
-        for date in future_dates:
-            year = date.year
-            month = date.month
-            quarter = (month - 1) // 3 + 1
-            is_monsoon = 1 if month in [6, 7, 8, 9] else 0
-
-            rfh_lag1 = last_values.iloc[-1]['rfh'] if not last_values.empty else 0
-            rfh_lag2 = last_values.iloc[-2]['rfh'] if len(last_values) > 1 else 0
-            rfh_roll3 = last_values['rfh'].tail(3).mean() if len(last_values) >= 3 else rfh_lag1
-            rfh_roll6 = last_values['rfh'].tail(6).mean() if len(last_values) >= 6 else rfh_roll3
-            rfh_diff = rfh_lag1 - rfh_lag2 if len(last_values) > 1 else 0
-
-            month_avg_val = month_avg_rfh.get(month, 0)
-            month_w = month_weight.get(month, 1.0)
-
-            row = {
-                'year': year,
-                'month': month,
-                'quarter': quarter,
-                'is_monsoon': is_monsoon,
-                'rfh_lag1': rfh_lag1,
-                'rfh_lag2': rfh_lag2,
-                'rfh_roll3': rfh_roll3,
-                'rfh_roll6': rfh_roll6,
-                'rfh_diff': rfh_diff,
-                'sin_month': np.sin(2 * np.pi * month / 12),
-                'cos_month': np.cos(2 * np.pi * month / 12),
-                'month_avg_rfh': month_avg_val,
-                'season_Monsoon': 1 if month in [6, 7, 8, 9] else 0,
-                'season_Post-Monsoon': 1 if month in [10, 11] else 0,
-                'season_Summer': 1 if month in [3, 4, 5] else 0,
-                'season_Winter': 1 if month in [12, 1, 2] else 0,
-                'time_idx': (year - 2025) * 12 + month
-            }
-
-            input_df = pd.DataFrame([row])
-            for col in model_features:
-                if col not in input_df.columns:
-                    input_df[col] = 0
-
-            input_df = input_df[model_features]
-            pred = model.predict(input_df)[0]
-
-            noise = np.random.normal(0, base_noise_std)
-            year_var = 1 + np.random.uniform(-0.7, 0.7) if model_name == "XGBoost" else 1 + np.random.uniform(-0.5, 0.5)
-
-            pred = pred * year_var + noise
-            pred = (1 - alpha) * pred + alpha * month_avg_val * (month_w ** 1.5)
-
-            forecast_values.append({'date': date, 'yhat': pred})
-
-            new_row = pd.DataFrame({'date': [date], 'rfh': [pred], 'month': [month]})
-            last_values = pd.concat([last_values, new_row], ignore_index=True)
-            last_values = last_values.iloc[-6:]
-
-        return pd.DataFrame(forecast_values)
-    except Exception as e:
-        st.error(f"Error in generating recursive features for {model_name}: {e}")
-        return pd.DataFrame()
+@st.cache_resource
+def get_forecast_cache():
+    return ForecastCache()
+
+@track_cache(st.cache_resource, show_spinner="Preparing Prophet forecast...")
+def load_prophet_forecast(model_hash):
+    return artifact_forecast("Prophet")
+
+# Seeded ensemble, so a district/model/data combination always gives the same band
+@track_cache(st.cache_data, show_spinner="Simulating forecast ensemble...")
+def simulate_intervals(district, name, model_hash, data_hash, _state, _predictor):
+    lower, upper = prediction_interval(_state, _predictor, name, FORECAST_DATES)
+    return pd.DataFrame({'lower': lower[:, 0], 'upper': upper[:, 0]})
 
 # <!-- DESIGN: Data Processing and Forecast Generation -->
-historical_data = load_historical_data()
+historical_data, district_index = load_historical_data(data_version())
+future_dates = FORECAST_DATES
 forecast_df = pd.DataFrame()
-for name in selected_models:
-    model = models[name]
-    try:
-        future_dates = pd.date_range(start="2025-01-01", end="2035-12-01", freq="MS")
-        model_features = model.feature_names_in_ if hasattr(model, 'feature_names_in_') else [
-            'year', 'month', 'quarter', 'is_monsoon', 'rfh_lag1', 'rfh_lag2', 'rfh_roll3', 'rfh_roll6',
-            'rfh_diff', 'sin_month', 'cos_month', 'month_avg_rfh', 'season_Monsoon', 'season_Post-Monsoon',
-            'season_Summer', 'season_Winter', 'time_idx'
-        ]
-        forecast_data = generate_recursive_features(historical_data, district, future_dates, model_features, name, model)
-        if not forecast_data.empty and 'yhat' in forecast_data.columns:
-            forecast_df[name] = forecast_data['yhat']
-        else:
-            st.error(f"No 'yhat' column in forecast data for {name}")
-        forecast_df['Date'] = future_dates
-    except Exception as e:
-        st.error(f"{name} prediction failed: {e}")
+interval_dfs = {}
+# Contiguous row range of the district: an O(1) slice instead of a mask over every row
+if district_index is not None and district in district_index:
+    district_history = district_index.slice(historical_data, district).dropna(subset=['rfh'])
+else:
+    district_history = pd.DataFrame()
+if district_history.empty:
+    st.error(f"No historical data found for district {district}")
+else:
+    forecast_cache = get_forecast_cache()
+    pcode = district_index.pcode(district)
+    data_hash = history_hash(district_history)
+    state = None
+    for name in selected_models:
+        try:
+            if name == "SARIMA":
+                spec_path = district_model_path(name, pcode)
+                if not os.path.exists(spec_path):
+                    st.caption(f"ℹ️ No SARIMA model was trained for {district}; run `python train_models.py`.")
+                    continue
+                model_hash = file_hash(spec_path)
+                forecast_data = forecast_cache.get(pcode, name, model_hash, data_hash, future_dates)
+                count("forecast_cache", hit=forecast_data is not None)
+                if forecast_data is None:
+                    with timed("forecast.sarima"):
+                        forecast_data = sarima_forecast(read_spec(spec_path), district_history, future_dates)
+                    forecast_cache.put(pcode, name, model_hash, data_hash, future_dates, forecast_data)
+                forecast_df[name] = forecast_data
+                forecast_df['Date'] = future_dates
+                continue
+            model_hash = file_hash(model_path(name))
+            if name == "Prophet":
+                # Per-district fit when precomputed, otherwise the shipped national model
+                forecast_data = district_forecast(forecast_cache, pcode, data_hash, future_dates)
+                if forecast_data is None:
+                    forecast_data = predictions_for(load_prophet_forecast(model_hash), future_dates)
+                    st.caption("ℹ️ Prophet shows the national model; run `python run_prophet.py --districts` for district fits.")
+                forecast_df[name] = forecast_data
+                forecast_df['Date'] = future_dates
+                continue
+            forecast_data = forecast_cache.get(pcode, name, model_hash, data_hash, future_dates)
+            count("forecast_cache", hit=forecast_data is not None)
+            if forecast_data is None:
+                if state is None:
+                    state = build_state(historical_data, [district], index=district_index)
+                with timed(f"forecast.recursive.{name}"):
+                    forecast_data = recursive_forecast(state, models[name], name, future_dates)[:, 0]
+                forecast_cache.put(pcode, name, model_hash, data_hash, future_dates, forecast_data)
+            forecast_df[name] = forecast_data
+            forecast_df['Date'] = future_dates
+            if show_intervals:
+                if state is None:
+                    state = build_state(historical_data, [district], index=district_index)
+                interval_dfs[name] = simulate_intervals(district, name, model_hash, data_hash, state, models[name])
+        except Exception as e:
+            st.error(f"{name} prediction failed: {e}")
 
 # <!-- DESIGN: Plotting Section -->
 if not forecast_df.empty:
-    melted_df = forecast_df.melt(id_vars='Date', value_vars=selected_models, var_name='Model', value_name='Rainfall')
+    model_colors = ["#3498db", "#2ecc71", "#e74c3c"]
+    melted_df = forecast_df.melt(id_vars='Date', value_vars=[name for name in selected_models if name in forecast_df], var_name='Model', value_name='Rainfall')
     fig = px.line(
         melted_df, x='Date', y='Rainfall', color='Model',
         title=f"Forecasted Rainfall in {district} (2025–2035)",
-        color_discrete_sequence=["#3498db", "#2ecc71", "#e74c3c"]
+        color_discrete_sequence=model_colors
     )
+    # <!-- DESIGN: Prediction Interval Bands -->
+    for name, bands in interval_dfs.items():
+        color = model_colors[selected_models.index(name) % len(model_colors)].lstrip('#')
+        fill = f"rgba({int(color[0:2], 16)}, {int(color[2:4], 16)}, {int(color[4:6], 16)}, 0.15)"
+        fig.add_trace(go.Scatter(x=future_dates, y=bands['upper'], mode='lines', line=dict(width=0),
+                                 showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=future_dates, y=bands['lower'], mode='lines', line=dict(width=0),
+                                 fill='tonexty', fillcolor=fill, name=f"{name} 90% interval"))
+        forecast_df[f"{name} (5%)"] = bands['lower'].values
+        forecast_df[f"{name} (95%)"] = bands['upper'].values
     fig.update_layout(width=900, height=500, template="plotly_white")
 
     st.markdown('<div class="plot-container">', unsafe_allow_html=True)
-    st.plotly_chart(fig, use_container_width=True)
+    with timed("plotly.forecast"):
+        st.plotly_chart(fig, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
     # <!-- DESIGN: Download Button -->
     st.download_button("📥 Download Forecast CSV", forecast_df.to_csv(index=False), file_name=f"forecast_{district}_2025_2035.csv")
 
+# <!-- DESIGN: Bulk Export Section -->
+# Written to disk chunk by chunk (see export_forecasts.py) and reused until the data or a model changes
+EXPORT_FORMATS = {"parquet": "Parquet", "zip": "Zipped CSV"}
+EXPORT_MIME = {"parquet": "application/vnd.apache.parquet", "zip": "application/zip"}
+if district_index is not None and not historical_data.empty:
+    with st.expander("🌏 Export all districts"):
+        export_models = st.multiselect("Models to export", model_names, default=selected_models, key="export_models")
+        export_format = st.radio("Format", list(EXPORT_FORMATS), format_func=EXPORT_FORMATS.get, horizontal=True)
+        # Each interval runs 200 simulated paths per district, a few times the cost of the point forecasts
+        export_intervals = st.checkbox("Include 90% prediction intervals (ML models)", key="export_intervals",
+                                       help="Simulates 200 paths per district and model; the export takes several "
+                                            "times longer.")
+        if export_models:
+            path = export_path(export_models, export_intervals, export_format)
+            if not os.path.exists(path) and st.button("⚙️ Prepare export"):
+                bar = st.progress(0.0, text="Forecasting districts...")
+                with timed("export.forecasts"):
+                    export_forecasts(historical_data, district_index, export_models, path, export_format,
+                                     intervals=export_intervals,
+                                     progress=lambda done, total: bar.progress(done / total, text=f"{done}/{total} districts"))
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    st.download_button("📥 Download all districts", f, mime=EXPORT_MIME[export_format],
+                                       file_name=f"rainfall_forecasts_2025_2035{os.path.splitext(path)[1]}")
+
+debug_panel()
+
 # <!-- DESIGN: Footer Section -->
 st.markdown('<div class="footer">Powered by xAI | Rainfall Forecast Dashboard | © 2025</div>', unsafe_allow_html=True)
\ No newline at end of file
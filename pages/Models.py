@@ -1,17 +1,13 @@
+import os
 import streamlit as st
-import pandas as pd
-import numpy as np
-import joblib
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-import plotly.express as px
-
-# Model paths (not visible to UI)
-_model_files = {
-    "XGBoost": "xgb_model.pkl",
-    "Random Forest": "rf_model.pkl",
-    "LightGBM": "lgbm_model.pkl",
-    "Prophet": "prophet_model.pkl"
-}
+
+from utils.evaluation import (PANEL_DIR, TEST_DATA, load_feature_test_data, load_prophet_test_data,
+                              regression_metrics)
+from utils.forecast_cache import file_hash
+from utils.instrumentation import debug_panel, timed, track_cache
+from utils.model_registry import MODEL_FILES, get_predictor, model_path
+from utils.plotting import actual_vs_predicted, actual_vs_predicted_series, residuals
+from utils.prophet_runner import artifact_forecast, predictions_for
 
 # 💅 CSS
 st.markdown("""
@@ -77,66 +73,50 @@ st.markdown('<div class="title">📈 Model Performance Analyzer</div>', unsafe_a
 # Sidebar selections
 col1, col2 = st.columns([1, 1])
 with col1:
-    selected_model = st.selectbox("🧠 Select Model", list(_model_files.keys()))
+    selected_model = st.selectbox("🧠 Select Model", list(MODEL_FILES.keys()))
 with col2:
     plot_type = st.radio("📊 Select Plot Type", ["Scatter", "Bar"], horizontal=True)
 
-# Load model test data
-def load_test_data_and_align_features(_model, test_data_path="data/test_data.csv"):
-    df = pd.read_csv(test_data_path)
-    if "rfh" not in df.columns:
-        raise ValueError("Test data must contain 'rfh' column")
-    y_true = df["rfh"]
-    X_test_full = df.drop(columns=["rfh", "date"], errors='ignore')
+test_data_path = TEST_DATA
+if os.path.isdir(PANEL_DIR):
+    eval_set = st.radio("🗺️ Evaluation Data", ["Single district", "All districts"], horizontal=True)
+    if eval_set == "All districts":
+        test_data_path = PANEL_DIR
+
+# Cached results are keyed on the artifact, so a retrained or promoted model is picked up
+artifact = model_path(selected_model)
+model_hash = file_hash(artifact) if os.path.exists(artifact) else None
+
+def load_prophet_test_data_and_predict(name):
+    # Read from the precomputed forecast frame; Prophet's predict never runs per request
+    df = load_prophet_test_data()
+    forecast = artifact_forecast(name, extra_dates=df['ds'])
+    return df["y"].values, predictions_for(forecast, df['ds'])
+
+# Predictions are computed (and cached) only for the model being viewed
+@track_cache(st.cache_resource)
+def load_model_preds(name, model_hash, test_data_path=TEST_DATA):
     try:
-        model_features = _model.feature_names_in_
-    except AttributeError:
-        model_features = X_test_full.columns
-
-    season_columns = ['season_Monsoon', 'season_Post-Monsoon', 'season_Summer', 'season_Winter']
-    for col in season_columns:
-        if col not in X_test_full.columns:
-            X_test_full[col] = 0
-    available_features = [f for f in model_features if f in X_test_full.columns]
-    X_test = X_test_full[available_features]
-    return X_test, y_true
-
-def load_prophet_test_data_and_predict(model, test_data_path="data/prophet_test_data.csv"):
-    df = pd.read_csv(test_data_path)
-    df['ds'] = pd.to_datetime(df['ds'], errors='coerce')
-    df = df.dropna()
-    forecast = model.predict(df)
-    return df["y"].values, forecast["yhat"].values
-
-@st.cache_resource
-def load_model_preds():
-    results = {}
-    for name, path in _model_files.items():
-        try:
-            model = joblib.load(f"./model/{path}")
-            if name == "Prophet":
-                y_true, y_pred = load_prophet_test_data_and_predict(model)
-            else:
-                X_test, y_true = load_test_data_and_align_features(model)
-                y_pred = model.predict(X_test)
-            results[name] = (y_true, y_pred)
-        except Exception as e:
-            st.warning(f"⚠️ Failed to load {name}: {e}")
-    return results
+        if name == "Prophet":
+            return load_prophet_test_data_and_predict(name)
+        predictor = get_predictor(name)
+        X_test, y_true = load_feature_test_data(predictor, test_data_path)
+        return y_true, predictor.predict(X_test)
+    except Exception as e:
+        st.warning(f"⚠️ Failed to load {name}: {e}")
+        return None
 
 # Load predictions
-models = load_model_preds()
-if selected_model not in models:
+preds = load_model_preds(selected_model, model_hash, test_data_path)
+if preds is None:
     st.error("❌ Model failed to load. Check data or model file.")
     st.stop()
 
-y_true, y_pred = models[selected_model]
+y_true, y_pred = preds
 
 # Metrics
-mae = mean_absolute_error(y_true, y_pred)
-rmse = np.sqrt(mean_squared_error(y_true, y_pred))
-r2 = r2_score(y_true, y_pred)
-accuracy = 100 - (mae / np.mean(y_true) * 100) if np.mean(y_true) != 0 else 0
+metrics = regression_metrics(y_true, y_pred)
+mae, rmse, r2, accuracy = metrics['mae'], metrics['rmse'], metrics['r2'], metrics['accuracy']
 
 st.markdown('<div class="metric-container">', unsafe_allow_html=True)
 col1, col2, col3, col4 = st.columns(4)
@@ -146,45 +126,36 @@ col3.metric("R²", f"{r2:.2f}")
 col4.metric("Accuracy", f"{accuracy:.2f}%")
 st.markdown('</div>', unsafe_allow_html=True)
 
-# Plotting
-if plot_type == "Scatter":
-    fig1 = px.scatter(
-        x=y_true, y=y_pred,
-        labels={'x': 'Actual Rainfall (mm)', 'y': 'Predicted Rainfall (mm)'},
-        title=f"{selected_model} - Actual vs Predicted",
-        trendline="ols", color_discrete_sequence=["#3498db"]
-    )
-    fig1.add_scatter(x=[min(y_true), max(y_true)], y=[min(y_true), max(y_true)],
-                     mode='lines', name='Ideal', line=dict(color='red', dash='dash'))
-else:
-    fig1 = px.bar(
-        x=np.arange(len(y_true)),
-        y=[y_true, y_pred],
-        labels={'x': 'Index', 'value': 'Rainfall (mm)', 'variable': 'Type'},
-        title=f"{selected_model} - Actual vs Predicted (Bar)"
-    )
-
-fig1.update_layout(width=700, height=500, template="plotly_white")
-
-fig2 = px.scatter(
-    x=y_true, y=(y_true - y_pred),
-    labels={'x': 'Actual Rainfall (mm)', 'y': 'Residuals (mm)'},
-    title=f"{selected_model} - Residuals Analysis",
-    color=(y_true - y_pred), color_continuous_scale="RdBu",
-    size=(np.abs(y_true - y_pred)), size_max=15
-)
-fig2.update_layout(width=700, height=500, template="plotly_white")
+# Plotting: figures are built (and downsampled above WEBGL_THRESHOLD points) once per selection
+@track_cache(st.cache_data, show_spinner=False)
+def build_figures(name, model_hash, test_data_path, plot_type):
+    y_true, y_pred = load_model_preds(name, model_hash, test_data_path)
+    if plot_type == "Scatter":
+        fig1 = actual_vs_predicted(y_true, y_pred, f"{name} - Actual vs Predicted")
+    else:
+        fig1 = actual_vs_predicted_series(y_true, y_pred, f"{name} - Actual vs Predicted (Bar)")
+    fig1.update_layout(width=700, height=500, template="plotly_white")
+
+    fig2 = residuals(y_true, y_pred, f"{name} - Residuals Analysis")
+    fig2.update_layout(width=700, height=500, template="plotly_white")
+    return fig1, fig2
+
+fig1, fig2 = build_figures(selected_model, model_hash, test_data_path, plot_type)
 
 # ⬅️ Side-by-side layout with more width
 col1, col2 = st.columns([1.2, 1.2])
 with col1:
     st.markdown('<div class="plot-container">', unsafe_allow_html=True)
-    st.plotly_chart(fig1, use_container_width=True)
+    with timed("plotly.models"):
+        st.plotly_chart(fig1, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 with col2:
     st.markdown('<div class="plot-container">', unsafe_allow_html=True)
-    st.plotly_chart(fig2, use_container_width=True)
+    with timed("plotly.models"):
+        st.plotly_chart(fig2, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
+debug_panel()
+
 # Footer
 st.markdown('<div class="footer">Powered by xAI | Model Analysis Dashboard | © 2025</div>', unsafe_allow_html=True)
@@ -1,9 +1,10 @@
 import streamlit as st
-import pandas as pd
-import geopandas as gpd
-from sklearn.cluster import KMeans
 import plotly.graph_objects as go
-import json
+
+from utils.clustering import K_RANGE, load_clusters
+from utils.data_store import data_version, load_rainfall
+from utils.geo_assets import load_district_table, load_geojson
+from utils.instrumentation import debug_panel, timed, track_cache
 
 # Custom CSS for styling
 st.markdown(
@@ -54,75 +55,76 @@ st.markdown(
 
 # Sidebar for controls
 st.sidebar.title("🌧️ Clustering Options")
-n_clusters = st.sidebar.slider("Number of Clusters", min_value=2, max_value=6, value=4, step=1)
 
 # Main title
 st.markdown('<div class="title">🌧️ Rainfall Clustering Visualization</div>', unsafe_allow_html=True)
 
-@st.cache_data
-def load_cluster_data():
-    # Load rainfall data and drop the first row
-    df = pd.read_csv("data/bgd-rainfall-adm2-full.csv")
-    df = df.iloc[1:].reset_index(drop=True)
-    
-    # Convert 'rfh' to numeric, log non-numeric values for debugging
-    df['rfh'] = pd.to_numeric(df['rfh'], errors='coerce')
+# Keyed on the data version so an ingest or a replaced CSV is picked up
+@track_cache(st.cache_data)
+def load_cluster_data(version):
+    # Log non-numeric values for debugging ('rfh' is already numeric in the shared store)
+    df = load_rainfall()
     non_numeric = df[df['rfh'].isna()]
     if not non_numeric.empty:
-        st.warning(f"Found {len(non_numeric)} rows with non-numeric or missing 'rfh' values:\n{non_numeric.head().to_string()}")
-        df['rfh'] = df['rfh'].fillna(0)
-    
-    # Group by ADM2_PCODE and compute mean rainfall
-    district_rainfall = df.groupby('ADM2_PCODE')['rfh'].mean().reset_index()
-    
-    # Load shapefile
-    gdf = gpd.read_file("data/adm2Shape/bgd_admbnda_adm2_bbs_20201113.shp")
-    
-    # Merge with shapefile
-    merged_gdf = gdf.merge(district_rainfall, on='ADM2_PCODE', how='left')
-    merged_gdf['rfh'] = merged_gdf['rfh'].fillna(0)
+        st.warning(f"Found {len(non_numeric)} rows with non-numeric or missing 'rfh' values (treated as 0):\n{non_numeric.head().to_string()}")
+
+    # KMeans on 12-month climatology profiles, precomputed for every k in the slider range
+    clusters = load_clusters()
+    if not clusters.labels:
+        raise ValueError(f"Clustering needs more than {min(K_RANGE)} districts; the data has {len(clusters.pcodes)}.")
+    district_rainfall = clusters.frame(min(clusters.labels)).drop(columns='cluster')
+    for k, labels in clusters.labels.items():
+        district_rainfall[f'cluster_{k}'] = labels
+
+    # Merge with the district table (names and label points from the geometry assets)
+    district_df = load_district_table().merge(district_rainfall, on='ADM2_PCODE', how='left')
+    district_df['rfh'] = district_df['rfh'].fillna(0)
     
-    return merged_gdf
+    return district_df, clusters.scores, sorted(clusters.labels)
 
 # Load data
 try:
-    merged_gdf = load_cluster_data()
+    district_df, cluster_scores, k_values = load_cluster_data(data_version())
 except Exception as e:
     st.error(f"Error loading data: {e}")
     st.stop()
 
-# Perform KMeans clustering
-kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-merged_gdf['cluster'] = kmeans.fit_predict(merged_gdf[['rfh']])
+# Only the k values that were fitted: with few districts the larger ones are skipped
+if len(k_values) > 1:
+    n_clusters = st.sidebar.slider("Number of Clusters", min_value=k_values[0], max_value=k_values[-1],
+                                   value=min(4, k_values[-1]), step=1)
+else:
+    n_clusters = k_values[0]
+    st.sidebar.caption(f"Number of Clusters: {n_clusters} (the only value the district count allows)")
 
-# Prepare hover text
-merged_gdf['hover_text'] = merged_gdf['ADM2_EN'] + '<br>Rainfall: ' + merged_gdf['rfh'].round(2).astype(str) + ' mm<br>Cluster: ' + merged_gdf['cluster'].astype(str)
+# Reuse the cached labelling for the selected number of clusters
+district_df['cluster'] = district_df[f'cluster_{n_clusters}']
 
-# Convert datetime columns to string to avoid serialization issues
-for col in merged_gdf.select_dtypes(include=['datetime64']).columns:
-    merged_gdf[col] = merged_gdf[col].astype(str)
+# Cluster quality for every k
+st.sidebar.markdown("**Cluster quality by k**")
+st.sidebar.dataframe(cluster_scores.set_index('k').round(3), use_container_width=True)
 
-# Convert to GeoJSON
-geojson_data = json.loads(merged_gdf.to_json())
+# Prepare hover text
+district_df['hover_text'] = district_df['ADM2_EN'] + '<br>Rainfall: ' + district_df['rfh'].round(2).astype(str) + ' mm<br>Cluster: ' + district_df['cluster'].astype(str)
 
-# Create choropleth map
+# Create choropleth map (geometry is pre-simplified and pre-serialized)
 fig = go.Figure(go.Choroplethmapbox(
-    geojson=geojson_data,
+    geojson=load_geojson(),
     featureidkey="properties.ADM2_PCODE",
-    locations=merged_gdf['ADM2_PCODE'],
-    z=merged_gdf['cluster'],
+    locations=district_df['ADM2_PCODE'],
+    z=district_df['cluster'],
     colorscale="Viridis",
     marker_opacity=0.7,
     marker_line_width=0,
-    customdata=merged_gdf['hover_text'],
+    customdata=district_df['hover_text'],
     hovertemplate="%{customdata}<extra></extra>",
 ))
 
 # Add marker for highest rainfall district
-highest_rainfall_row = merged_gdf.loc[merged_gdf['rfh'].idxmax()]
+highest_rainfall_row = district_df.loc[district_df['rfh'].idxmax()]
 highest_district = highest_rainfall_row['ADM2_EN']
-highest_lat = highest_rainfall_row.geometry.centroid.y
-highest_lon = highest_rainfall_row.geometry.centroid.x
+highest_lat = highest_rainfall_row['lat']
+highest_lon = highest_rainfall_row['lon']
 highest_rainfall = highest_rainfall_row['rfh']
 
 fig.add_trace(go.Scattermapbox(
@@ -157,9 +159,12 @@ fig.update_layout(
 
 # Display map in a styled container
 st.markdown('<div class="map-container">', unsafe_allow_html=True)
-st.plotly_chart(fig, use_container_width=True)
+with timed("plotly.clustering"):
+    st.plotly_chart(fig, use_container_width=True)
 st.markdown('</div>', unsafe_allow_html=True)
 
+debug_panel()
+
 # Add a footer
 st.markdown(
     "<p style='text-align: center; color: #666; font-size: 12px;'>Powered by xAI | Rainfall Data Clustering | © 2025</p>",
@@ -1,10 +1,12 @@
 # pages/2_Visualizations.py
 import streamlit as st
-import pandas as pd
-import geopandas as gpd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-import json
+
+from utils.geo_assets import load_district_table, load_geojson
+from utils.instrumentation import debug_panel, timed
+from utils.rollups import SEASONS, load_cube
 
 # --- Custom CSS for styling ---
 st.markdown(
@@ -70,29 +72,7 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-@st.cache_data
-def load_data():
-    data = pd.read_csv("data/bgd-rainfall-adm2-full.csv", low_memory=False)
-    gdf = gpd.read_file("data/adm2Shape/bgd_admbnda_adm2_bbs_20201113.shp")
-
-    # Fix date column and remove headers/errors
-    data = data.iloc[1:].reset_index(drop=True)
-    data['date'] = pd.to_datetime(data['date'], errors='coerce')
-    data = data.dropna(subset=['date'])
-    data['rfh'] = pd.to_numeric(data['rfh'], errors='coerce').fillna(0)
-
-    # Add derived columns
-    data['year'] = data['date'].dt.year
-    data['month'] = data['date'].dt.month
-    data['season'] = data['month'].map({
-        12: "Winter", 1: "Winter", 2: "Winter",
-        3: "Summer", 4: "Summer", 5: "Summer",
-        6: "Monsoon", 7: "Monsoon", 8: "Monsoon", 9: "Monsoon",
-        10: "Post-Monsoon", 11: "Post-Monsoon"
-    })
-    return data, gdf
-
-data, gdf = load_data()
+cube = load_cube()
 
 st.title("\U0001F4CA Rainfall Visualizations")
 
@@ -103,29 +83,27 @@ viz_option = st.selectbox("Choose a visualization", [
 ])
 
 if viz_option == "District-wise Rainfall Map":
-    year = st.slider("Select Year", int(data['year'].min()), int(data['year'].max()), 2020)
-    season_option = st.selectbox("Select Season", ["All", "Winter", "Summer", "Monsoon", "Post-Monsoon"])
-
-    df = data[data['year'] == year]
-    if season_option != "All":
-        df = df[df['season'] == season_option]
+    year = st.slider("Select Year", int(cube.years[0]), int(cube.years[-1]), 2020)
+    season_option = st.selectbox("Select Season", SEASONS)
 
-    rainfall_summary = df.groupby('ADM2_PCODE')['rfh'].sum().reset_index()
-    merged_gdf = gdf.merge(rainfall_summary, on='ADM2_PCODE', how='left')
-    merged_gdf['rfh'] = merged_gdf['rfh'].fillna(0)
+    # Precomputed district x year x season totals: a slice, not a groupby
+    rainfall_summary = cube.district_totals(year, season_option)
 
-    # Convert datetime cols to string for JSON serialization
-    for col in merged_gdf.select_dtypes(include=['datetime64']).columns:
-        merged_gdf[col] = merged_gdf[col].astype(str)
+    # Geometry is pre-simplified and pre-serialized; only z changes per interaction
+    # Cube rows into district-table order by PCODE (both sorted); districts without rainfall show 0
+    districts = load_district_table()
+    geo_pcodes = districts['ADM2_PCODE'].to_numpy(dtype=str)
+    rows = np.searchsorted(cube.pcodes, geo_pcodes).clip(max=len(cube.pcodes) - 1)
+    z = np.where(cube.pcodes[rows] == geo_pcodes, rainfall_summary[rows], 0.0)
 
     fig = go.Figure(go.Choroplethmapbox(
-        geojson=json.loads(merged_gdf.to_json()),
-        locations=merged_gdf['ADM2_PCODE'],
-        z=merged_gdf['rfh'],
+        geojson=load_geojson(),
+        locations=districts['ADM2_PCODE'],
+        z=z,
         colorscale="Blues",
         marker_opacity=0.7,
         marker_line_width=0,
-        customdata=merged_gdf['ADM2_EN'],
+        customdata=districts['ADM2_EN'],
         hovertemplate="%{customdata}<br>Rainfall: %{z} mm<extra></extra>",
         featureidkey="properties.ADM2_PCODE"
     ))
@@ -139,22 +117,27 @@ if viz_option == "District-wise Rainfall Map":
     )
 
     st.markdown('<div class="map-container">', unsafe_allow_html=True)
-    st.plotly_chart(fig, use_container_width=True)
+    with timed("plotly.visualizations"):
+        st.plotly_chart(fig, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
 elif viz_option == "Seasonal Variation":
-    seasonal_data = data.groupby(['year', 'season'])['rfh'].mean().reset_index()
+    seasonal_data = cube.seasonal_means()
     fig = px.line(seasonal_data, x='year', y='rfh', color='season',
                   title='Average Rainfall by Season',
                   labels={'rfh': 'Rainfall (mm)', 'year': 'Year'})
-    st.plotly_chart(fig, use_container_width=True)
+    with timed("plotly.visualizations"):
+        st.plotly_chart(fig, use_container_width=True)
 
 elif viz_option == "Yearly Rainfall Trend":
-    yearly_data = data.groupby('year')['rfh'].sum().reset_index()
+    yearly_data = cube.yearly_totals()
     fig = px.line(yearly_data, x='year', y='rfh',
                   title='Total Yearly Rainfall',
                   labels={'rfh': 'Rainfall (mm)', 'year': 'Year'})
-    st.plotly_chart(fig, use_container_width=True)
+    with timed("plotly.visualizations"):
+        st.plotly_chart(fig, use_container_width=True)
+
+debug_panel()
 
 # Footer
 st.markdown(
@@ -0,0 +1,38 @@
+import argparse
+import os
+import sys
+import time
+
+from utils.data_store import load_rainfall
+from utils.district_index import load_index
+from utils.evaluation import PROPHET_TEST_DATA, load_prophet_test_data
+from utils.prophet_runner import artifact_forecast, fit_districts
+from utils.model_registry import available_models
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute Prophet forecasts for the dashboard.")
+    parser.add_argument("--districts", nargs="*", help="also fit per-district models (no names: every district)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes for per-district fits")
+    parser.add_argument("--prophet-test-data", default=PROPHET_TEST_DATA)
+    args = parser.parse_args()
+
+    if available_models(["Prophet"]):
+        start = time.perf_counter()
+        extra = load_prophet_test_data(args.prophet_test_data)['ds'] if os.path.exists(args.prophet_test_data) else None
+        frame = artifact_forecast("Prophet", extra_dates=extra)
+        print(f"✅ Prophet artifact forecast cached: {len(frame)} months ({time.perf_counter() - start:.1f}s)")
+    else:
+        print("⚠️ No Prophet artifact found, skipping the national forecast.")
+
+    if args.districts is not None:
+        index = load_index()
+        districts = args.districts or None
+        unknown = [d for d in (districts or []) if d not in index]
+        if unknown:
+            sys.exit(f"❌ Unknown district(s): {', '.join(unknown)}")
+        start = time.perf_counter()
+        fitted, errors = fit_districts(load_rainfall(), index, districts, workers=args.workers,
+                               progress=lambda pcode: print(f"  fitted {pcode}", file=sys.stderr))
+        for pcode, e in errors.items():
+            print(f"⚠️ Prophet fit failed for {pcode}: {e}", file=sys.stderr)
+        print(f"✅ {fitted} district Prophet forecasts fitted ({time.perf_counter() - start:.1f}s); others were cached")
@@ -0,0 +1,89 @@
+import argparse
+import os
+import sys
+import time
+
+from utils.data_store import load_rainfall
+from utils.district_index import load_index
+from utils.features import load_feature_table
+from utils.model_formats import export_model
+from utils.model_registry import FEATURE_MODELS
+from utils.predictors import resolve_features
+from utils.sarima import SARIMA_ORDER, SEASONAL_ORDER, fit_districts
+from utils.training import (artifact_path, list_versions, new_version, promote, read_manifest, save_model,
+                            train_global, write_manifest)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Retrain the global models and per-district SARIMA models into a new model version.")
+    parser.add_argument("--models", nargs="*", default=FEATURE_MODELS, choices=FEATURE_MODELS,
+                        help="global models to train (no names: none)")
+    parser.add_argument("--skip-sarima", action="store_true")
+    parser.add_argument("--districts", nargs="+", help="districts for SARIMA (default: every district)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes for SARIMA fits")
+    parser.add_argument("--full", action="store_true", help="refit global models on every row after scoring")
+    parser.add_argument("--resume", metavar="VERSION", help="continue an interrupted version instead of starting one")
+    parser.add_argument("--promote", action="store_true", help="make the dashboard use this version when done")
+    args = parser.parse_args()
+
+    if args.resume and args.resume not in list_versions():
+        sys.exit(f"❌ Unknown version {args.resume}; available: {', '.join(list_versions()) or 'none'}")
+    version = args.resume or new_version()
+    manifest = read_manifest(version)
+    os.makedirs(os.path.dirname(artifact_path(version, FEATURE_MODELS[0])), exist_ok=True)
+    print(f"📦 Model version {version}", file=sys.stderr)
+
+    # ====== Global models on the shared feature table ======
+    if args.models:
+        start = time.perf_counter()
+        table = load_feature_table()
+        print(f"✅ Feature table: {len(table)} rows ({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+        for name in args.models:
+            path = artifact_path(version, name)
+            if os.path.exists(path) and name in manifest['models']:
+                print(f"  {name}: already trained, skipping", file=sys.stderr)
+                continue
+            start = time.perf_counter()
+            model, metrics = train_global(name, table, full=args.full)
+            save_model(model, path)
+            export_model(name, model, os.path.dirname(path), resolve_features(model))
+            manifest['models'][name] = {'file': os.path.basename(path), 'full': args.full, 'metrics': metrics}
+            write_manifest(version, manifest)
+            print(f"✅ {name}: MAE {metrics['mae']:.2f}, RMSE {metrics['rmse']:.2f}, R² {metrics['r2']:.3f} "
+                  f"({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+
+    # ====== Per-district SARIMA, one checkpoint file per district ======
+    if not args.skip_sarima:
+        index = load_index()
+        unknown = [d for d in (args.districts or []) if d not in index]
+        if unknown:
+            sys.exit(f"❌ Unknown district(s): {', '.join(unknown)}")
+        total = len(args.districts or index.districts)
+        done = []
+
+        def report(spec):
+            done.append(spec['pcode'])
+            flag = "" if spec['converged'] else " (not converged)"
+            print(f"⏳ [{len(done)}/{total}] {spec['pcode']}: AIC {spec['aic']:.1f}{flag}", file=sys.stderr)
+
+        start = time.perf_counter()
+        sarima_dir = artifact_path(version, "SARIMA")
+        fitted, skipped, errors = fit_districts(load_rainfall(), index, sarima_dir, args.districts,
+                                                workers=args.workers, progress=report)
+        for pcode, e in errors.items():
+            print(f"⚠️ SARIMA fit failed for {pcode}: {e}", file=sys.stderr)
+        specs = [f for f in os.listdir(sarima_dir) if f.endswith(".json")] if os.path.isdir(sarima_dir) else []
+        manifest['models']["SARIMA"] = {'file': os.path.basename(sarima_dir), 'order': list(SARIMA_ORDER),
+                                        'seasonal_order': list(SEASONAL_ORDER), 'districts': len(specs)}
+        write_manifest(version, manifest)
+        print(f"✅ SARIMA: {fitted} fitted, {skipped} from checkpoints, {len(errors)} failed "
+              f"({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+        if errors:
+            print(f"ℹ️ Re-run with --resume {version} to retry the failed districts.", file=sys.stderr)
+
+    write_manifest(version, manifest)
+    if args.promote:
+        promote(version)
+        print(f"✅ Version {version} promoted; the dashboard now loads it.", file=sys.stderr)
+    else:
+        print(f"ℹ️ Promote with: python train_models.py --resume {version} --promote", file=sys.stderr)
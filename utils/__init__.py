@@ -0,0 +1 @@
+# Shared data-access and modelling helpers used by the Streamlit pages and scripts.
@@ -0,0 +1,196 @@
+"""Rolling-origin backtests of the recursive forecast.
+
+For each cutoff month the forecast is replayed from the history before that
+month: each district gets the last ``WINDOW`` observations and a monthly
+climatology computed only from rows before the cutoff, so nothing after the
+origin leaks in. It is then compared, step by step, with the observed monthly
+mean rainfall. The state of a cutoff comes from running per-month sums over
+the cached store and district index, so no per-cutoff filtering or feature
+rebuild is needed. All (cutoff, district) pairs of a chunk advance together
+as rows of one batch, one ``predict`` call per step and model. Chunks run in
+a process pool.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from utils.data_store import load_rainfall
+from utils.district_index import load_index
+from utils.evaluation import regression_metrics
+from utils.forecast_engine import WINDOW, DistrictState, RingBuffer, recursive_forecast
+
+HORIZON = 24
+CUTOFF_EVERY = 3
+# Years of history a district needs before the first default cutoff
+MIN_HISTORY_YEARS = 10
+CHUNK_CUTOFFS = 8
+RESULT_COLUMNS = ['model', 'cutoff', 'ADM2_PCODE', 'horizon', 'date', 'y_true', 'y_pred']
+
+
+def _month_number(dates):
+    dates = pd.DatetimeIndex(dates)
+    return dates.year.to_numpy() * 12 + dates.month.to_numpy() - 1
+
+
+def _month_dates(numbers):
+    months = (np.asarray(numbers, dtype=np.int64) - 1970 * 12).astype('datetime64[M]')
+    return pd.DatetimeIndex(months.astype('datetime64[ns]'))
+
+
+class History:
+    """Observed rows of every district, prepared for cutting at any month."""
+
+    def __init__(self, store, index):
+        self.pcodes = [str(p) for p in index.pcodes]
+        rfh_all = store['rfh'].to_numpy(dtype=np.float64)
+        dates_all = store['date'].to_numpy(dtype='datetime64[ns]')
+        month_all = store['month'].to_numpy(dtype=np.int64)
+        self.rfh, self.dates, self.month_sums, self.month_counts = [], [], [], []
+        first, last = [], []
+        for i in range(len(self.pcodes)):
+            rows = slice(int(index.starts[i]), int(index.stops[i]))
+            observed = ~np.isnan(rfh_all[rows])
+            rfh, dates = rfh_all[rows][observed], dates_all[rows][observed]
+            onehot = np.zeros((len(rfh) + 1, 12))
+            onehot[np.arange(1, len(rfh) + 1), month_all[rows][observed] - 1] = 1
+            self.rfh.append(rfh)
+            self.dates.append(dates)
+            # Row k holds the sums over the first k observations
+            self.month_sums.append(np.cumsum(onehot * np.concatenate([[0.0], rfh])[:, None], axis=0))
+            self.month_counts.append(np.cumsum(onehot, axis=0))
+            first.append(dates[0] if len(dates) else np.datetime64('NaT'))
+            last.append(dates[-1] if len(dates) else np.datetime64('NaT'))
+        self.first = pd.DatetimeIndex(first)
+        self.last = pd.DatetimeIndex(last)
+
+        # Observed monthly means as a (districts x months) matrix
+        self.month0 = int(_month_number([self.first.min()])[0])
+        n_months = int(_month_number([self.last.max()])[0]) - self.month0 + 1
+        self.actual = np.full((len(self.pcodes), n_months), np.nan)
+        for i, (rfh, dates) in enumerate(zip(self.rfh, self.dates)):
+            cells = _month_number(dates) - self.month0
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = np.bincount(cells, rfh, minlength=n_months) / np.bincount(cells, minlength=n_months)
+            self.actual[i] = np.where(np.bincount(cells, minlength=n_months) > 0, means, np.nan)
+
+    def state(self, cutoffs, window=WINDOW):
+        """Forecast state of every (cutoff, district) pair, from rows dated before the cutoff.
+
+        Returns (state, row cutoffs, row district positions); pairs without
+        any earlier observation are left out.
+        """
+        values, counts, month_avg, row_cutoff, row_district = [], [], [], [], []
+        for cutoff in pd.DatetimeIndex(cutoffs):
+            stamp = cutoff.to_datetime64()
+            for i, (rfh, dates) in enumerate(zip(self.rfh, self.dates)):
+                p = int(np.searchsorted(dates, stamp, side='left'))
+                if p == 0:
+                    continue
+                tail = np.full(window, np.nan)
+                tail[window - min(p, window):] = rfh[max(0, p - window):p]
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    month_avg.append(self.month_sums[i][p] / self.month_counts[i][p])
+                values.append(tail)
+                counts.append(min(p, window))
+                row_cutoff.append(cutoff)
+                row_district.append(i)
+        buffer = RingBuffer(np.array(values).reshape(len(values), window), np.array(counts, dtype=np.int64))
+        state = DistrictState([self.pcodes[i] for i in row_district], buffer,
+                              np.array(month_avg).reshape(len(values), 12))
+        return state, pd.DatetimeIndex(row_cutoff), np.array(row_district, dtype=np.int64)
+
+    def default_cutoffs(self, horizon=HORIZON, every=CUTOFF_EVERY, min_history_years=MIN_HISTORY_YEARS):
+        """Cutoff months from ``min_history_years`` after the data starts until ``horizon`` months remain."""
+        start = self.first.min() + pd.DateOffset(years=min_history_years)
+        end = self.last.max().to_period('M').to_timestamp() - pd.DateOffset(months=horizon - 1)
+        return pd.date_range(start.to_period('M').to_timestamp(), end, freq=f"{every}MS")
+
+
+_histories = {}
+
+
+def load_history():
+    # Built once per process from the cached store and district index
+    store = load_rainfall()
+    key = id(store)
+    if key not in _histories:
+        _histories.clear()
+        _histories[key] = History(store, load_index())
+    return _histories[key]
+
+
+def run_chunk(cutoffs, names, horizon=HORIZON, noise=False, seed=0, loader=None):
+    """Replay the forecast from ``cutoffs`` with each model; long frame of RESULT_COLUMNS."""
+    from utils.model_registry import get_predictor
+
+    loader = get_predictor if loader is None else loader
+    history = load_history()
+    state, row_cutoff, row_district = history.state(cutoffs)
+    start_month = _month_number(row_cutoff)
+    step_dates = [_month_dates(start_month + k) for k in range(horizon)]
+
+    cells = (start_month - history.month0)[None, :] + np.arange(horizon)[:, None]
+    inside = cells < history.actual.shape[1]
+    y_true = np.full(cells.shape, np.nan)
+    y_true[inside] = history.actual[np.broadcast_to(row_district, cells.shape)[inside], cells[inside]]
+
+    frames = []
+    for name in names:
+        rng = np.random.default_rng([seed, int(start_month.min()) if len(start_month) else 0])
+        y_pred = recursive_forecast(state, loader(name), name, step_dates, rng=rng, noise=noise)
+        keep = ~np.isnan(y_true)
+        step, row = np.nonzero(keep)
+        frames.append(pd.DataFrame({
+            'model': name,
+            'cutoff': row_cutoff[row],
+            'ADM2_PCODE': np.array(history.pcodes, dtype=object)[row_district[row]],
+            'horizon': step + 1,
+            'date': np.stack([dates.to_numpy() for dates in step_dates])[step, row],
+            'y_true': y_true[keep],
+            'y_pred': y_pred[keep],
+        }))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=RESULT_COLUMNS)
+
+
+def run_backtest(names, cutoffs=None, horizon=HORIZON, noise=False, seed=0, workers=1,
+                 chunk_cutoffs=CHUNK_CUTOFFS, progress=None):
+    """Backtest ``names`` from every cutoff; returns the long results frame.
+
+    Cutoffs are split into chunks of ``chunk_cutoffs`` that run in
+    ``workers`` processes. ``progress`` is called with (done, total) chunks.
+    With ``noise`` the random perturbations of the dashboard forecast are
+    replayed, seeded per chunk.
+    """
+    cutoffs = load_history().default_cutoffs(horizon) if cutoffs is None else pd.DatetimeIndex(cutoffs)
+    chunks = [cutoffs[i:i + chunk_cutoffs] for i in range(0, len(cutoffs), chunk_cutoffs)]
+    frames = []
+    if workers <= 1:
+        for i, chunk in enumerate(chunks):
+            frames.append(run_chunk(chunk, names, horizon, noise, seed))
+            if progress is not None:
+                progress(i + 1, len(chunks))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks) or 1)) as pool:
+            futures = [pool.submit(run_chunk, chunk, names, horizon, noise, seed) for chunk in chunks]
+            for i, future in enumerate(as_completed(futures)):
+                frames.append(future.result())
+                if progress is not None:
+                    progress(i + 1, len(chunks))
+    if not frames:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    return pd.concat(frames, ignore_index=True).sort_values(['model', 'cutoff', 'ADM2_PCODE', 'horizon'],
+                                                            ignore_index=True)
+
+
+def horizon_metrics(results):
+    """Error metrics per model and horizon (months ahead)."""
+    rows = []
+    for (name, horizon), group in results.groupby(['model', 'horizon'], sort=True):
+        metrics = regression_metrics(group['y_true'], group['y_pred'])
+        metrics.update(model=name, horizon=horizon, bias=float((group['y_pred'] - group['y_true']).mean()),
+                       n=len(group))
+        rows.append(metrics)
+    columns = ['model', 'horizon', 'n', 'mae', 'rmse', 'bias', 'r2', 'accuracy']
+    return pd.DataFrame(rows, columns=columns)
+
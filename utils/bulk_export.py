@@ -0,0 +1,174 @@
+"""Country-wide forecast exports, written as they are produced.
+
+Forecasts are computed a few districts at a time. Feature models go through
+the ``ForecastBatcher``, so cached forecasts are reused and new ones cached.
+Prophet and SARIMA are served as on the Forecast page. Each chunk becomes long
+rows (ADM2_PCODE, ADM2_EN, model, date, yhat and optionally lower/upper) that
+are appended to a Parquet file as one row group, or to a CSV member of a ZIP
+archive. Only one chunk is ever held in memory.
+"""
+import glob
+import hashlib
+import io
+import json
+import os
+import threading
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from utils.data_store import CACHE_DIR, data_version
+from utils.forecast_batcher import ForecastBatcher
+from utils.forecast_cache import FORECAST_CACHE_DIR, ForecastCache, file_hash, history_hash
+from utils.forecast_engine import FORECAST_DATES, build_state, prediction_interval
+from utils.model_registry import DISTRICT_MODELS, FEATURE_MODELS, district_model_path, get_predictor, model_path
+from utils.prophet_runner import artifact_forecast, district_forecast, predictions_for
+from utils.sarima import forecast as sarima_forecast, read_spec
+
+EXPORT_DIR = os.path.join(CACHE_DIR, "exports")
+EXPORT_COLUMNS = ['ADM2_PCODE', 'ADM2_EN', 'model', 'date', 'yhat', 'lower', 'upper']
+FORMATS = {"parquet": ".parquet", "zip": ".zip"}
+CHUNK_DISTRICTS = 8
+
+
+def _rows(pcode, district, name, future_dates, values, bands=None):
+    lower, upper = bands if bands is not None else (np.nan, np.nan)
+    return pd.DataFrame({
+        'ADM2_PCODE': pcode,
+        'ADM2_EN': district,
+        'model': name,
+        'date': future_dates,
+        'yhat': np.asarray(values, dtype=np.float32),
+        'lower': np.broadcast_to(np.asarray(lower, dtype=np.float32), len(future_dates)),
+        'upper': np.broadcast_to(np.asarray(upper, dtype=np.float32), len(future_dates)),
+    })
+
+
+def forecast_chunks(history, index, models, districts=None, intervals=False, future_dates=FORECAST_DATES,
+                    chunk=CHUNK_DISTRICTS, cache=None, progress=None):
+    """Yield long forecast frames (EXPORT_COLUMNS) for ``chunk`` districts at a time.
+
+    Districts a model has no forecast for (a SARIMA district that was not
+    fitted, or a district without observed rainfall) are left out. Intervals
+    are only available for the feature models; other models get empty bounds. ``progress`` is called with
+    (districts done, total) after each chunk.
+    """
+    cache = ForecastCache() if cache is None else cache
+    districts = index.districts if districts is None else list(districts)
+    feature_models = [name for name in models if name in FEATURE_MODELS]
+    batcher = ForecastBatcher(history, disk_cache=cache, future_dates=future_dates, index=index) if feature_models else None
+    national = None
+
+    try:
+        for start in range(0, len(districts), chunk):
+            names = districts[start:start + chunk]
+            point = batcher.forecast(names, feature_models) if batcher is not None else {}
+            # Interval ensembles of the whole chunk advance together, one batch per model
+            chunk_bands = {}
+            if intervals and feature_models:
+                state = build_state(history, names, index=index)
+                for name in feature_models:
+                    lower, upper = prediction_interval(state, get_predictor(name), name, future_dates)
+                    chunk_bands[name] = {d: (lower[:, i], upper[:, i]) for i, d in enumerate(state.districts)}
+            frames = []
+            for district in names:
+                pcode = index.pcode(district)
+                rows = index.slice(history, district).dropna(subset=['rfh'])
+                for name in models:
+                    bands = None
+                    if name in feature_models:
+                        values = point[name][district]
+                        if values is None:
+                            continue
+                        bands = chunk_bands.get(name, {}).get(district)
+                    elif name == "SARIMA":
+                        spec_path = district_model_path(name, pcode)
+                        if not os.path.exists(spec_path):
+                            continue
+                        values = sarima_forecast(read_spec(spec_path), rows, future_dates)
+                    else:
+                        # Per-district Prophet fit when precomputed, otherwise the national model
+                        values = district_forecast(cache, pcode, history_hash(rows), future_dates)
+                        if values is None:
+                            national = artifact_forecast("Prophet") if national is None else national
+                            values = predictions_for(national, future_dates)
+                    frames.append(_rows(pcode, district, name, future_dates, values, bands))
+            if frames:
+                yield pd.concat(frames, ignore_index=True)
+            if progress is not None:
+                progress(start + len(names), len(districts))
+    finally:
+        # The batcher's worker thread would otherwise outlive the export
+        if batcher is not None:
+            batcher.close()
+
+
+def write_parquet(chunks, target):
+    """Append each chunk to ``target`` (path or binary file) as a row group; returns the row count."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('ADM2_PCODE', pa.string()), ('ADM2_EN', pa.string()), ('model', pa.string()),
+        ('date', pa.timestamp('ns')), ('yhat', pa.float32()), ('lower', pa.float32()), ('upper', pa.float32()),
+    ])
+    rows = 0
+    with pq.ParquetWriter(target, schema, compression="zstd") as writer:
+        for frame in chunks:
+            writer.write_table(pa.Table.from_pandas(frame[EXPORT_COLUMNS], schema=schema, preserve_index=False))
+            rows += len(frame)
+    return rows
+
+
+def write_zip_csv(chunks, target, member="rainfall_forecasts_2025_2035.csv"):
+    """Stream the chunks as one CSV member of a ZIP at ``target`` (path or binary file)."""
+    rows = 0
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(member, "w", force_zip64=True) as raw:
+            text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+            for frame in chunks:
+                frame[EXPORT_COLUMNS].to_csv(text, header=rows == 0, index=False, date_format="%Y-%m-%d")
+                rows += len(frame)
+            text.flush()
+            text.detach()
+    return rows
+
+
+WRITERS = {"parquet": write_parquet, "zip": write_zip_csv}
+
+
+def _model_hash(name, cache_root=FORECAST_CACHE_DIR):
+    if name in DISTRICT_MODELS:
+        # The parameter files of every district
+        directory = model_path(name)
+        parts = [file_hash(os.path.join(directory, f)) for f in sorted(os.listdir(directory))]
+    elif name == "Prophet":
+        # The national artifact plus whichever district fits are cached
+        parts = [file_hash(model_path(name))] + sorted(
+            os.path.basename(p) for p in glob.glob(os.path.join(cache_root, "*__Prophet__*.parquet")))
+    else:
+        return file_hash(model_path(name))
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+def export_path(models, intervals, fmt):
+    """Cache path of a full export for the current data and model artifacts."""
+    key = json.dumps({'data': data_version(), 'models': {name: _model_hash(name) for name in models},
+                      'intervals': intervals, 'horizon': [f"{FORECAST_DATES[0]:%Y-%m}", f"{FORECAST_DATES[-1]:%Y-%m}"]},
+                     sort_keys=True)
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return os.path.join(EXPORT_DIR, f"forecasts_{digest}{FORMATS[fmt]}")
+
+
+def export_forecasts(history, index, models, path, fmt="parquet", districts=None, intervals=False, progress=None):
+    """Write every district's forecasts for ``models`` to ``path``; returns the row count.
+
+    The file is written under a temporary name and renamed when complete.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    chunks = forecast_chunks(history, index, models, districts, intervals, progress=progress)
+    rows = WRITERS[fmt](chunks, tmp_path)
+    os.replace(tmp_path, path)
+    return rows
@@ -0,0 +1,103 @@
+"""KMeans clustering of districts on their 12-month rainfall climatology.
+
+Results for every k in ``K_RANGE`` are fitted once per data version and kept
+on disk and in memory, so moving the cluster-count slider only selects a
+precomputed labelling. Labels are ordered by mean rainfall (cluster 0 is the
+driest), which keeps colours comparable between values of k.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import StandardScaler
+
+from utils.data_store import CACHE_DIR, data_version
+from utils.rollups import load_cube
+
+CLUSTER_PATH = os.path.join(CACHE_DIR, "clusters.json")
+K_RANGE = range(2, 7)
+RANDOM_STATE = 42
+
+_lock = threading.Lock()
+_results = {}
+
+
+class ClusterResults:
+    def __init__(self, pcodes, mean_rfh, profiles, labels, scores):
+        self.pcodes = pcodes
+        self.mean_rfh = mean_rfh
+        self.profiles = profiles
+        self.labels = labels
+        self.scores = scores
+
+    def frame(self, k):
+        """One row per district: PCODE, mean rainfall and cluster label for ``k``."""
+        return pd.DataFrame({'ADM2_PCODE': self.pcodes, 'rfh': self.mean_rfh, 'cluster': self.labels[k]})
+
+
+def district_profiles(cube):
+    """Monthly climatology (districts x 12) and overall mean rainfall per district."""
+    profiles = np.nan_to_num(cube.monthly_climatology(), nan=0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_rfh = cube.sums.sum(axis=(1, 2)) / cube.counts.sum(axis=(1, 2))
+    return profiles, np.nan_to_num(mean_rfh, nan=0.0)
+
+
+def fit_clusters(profiles, mean_rfh, k_range=K_RANGE):
+    X = StandardScaler().fit_transform(profiles)
+    labels, scores = {}, []
+    for k in k_range:
+        if k >= len(X):
+            break
+        kmeans = KMeans(n_clusters=k, random_state=RANDOM_STATE, n_init=10).fit(X)
+        # Renumber clusters from driest to wettest
+        order = np.argsort([mean_rfh[kmeans.labels_ == c].mean() for c in range(k)])
+        labels[k] = np.argsort(order)[kmeans.labels_]
+        scores.append({'k': k, 'inertia': float(kmeans.inertia_), 'silhouette': float(silhouette_score(X, kmeans.labels_))})
+    return labels, pd.DataFrame(scores)
+
+
+def load_clusters(path=CLUSTER_PATH, k_range=K_RANGE):
+    """Clusterings for every k in ``k_range`` for the current data version."""
+    version = data_version()
+    key = (version, tuple(k_range))
+    with _lock:
+        if key in _results:
+            return _results[key]
+        cube = load_cube()
+        profiles, mean_rfh = district_profiles(cube)
+        stored = _read(path)
+        if stored.get('version') == version and stored.get('k_range') == list(k_range):
+            labels = {int(k): np.asarray(v) for k, v in stored['labels'].items()}
+            scores = pd.DataFrame(stored['scores'])
+        else:
+            labels, scores = fit_clusters(profiles, mean_rfh, k_range)
+            _write(path, {
+                'version': version,
+                'k_range': list(k_range),
+                'labels': {str(k): v.tolist() for k, v in labels.items()},
+                'scores': scores.to_dict(orient='records'),
+            })
+        _results.clear()
+        _results[key] = ClusterResults(cube.pcodes, mean_rfh, profiles, labels, scores)
+        return _results[key]
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write(path, payload):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,200 @@
+"""Columnar cache of the ADM2 rainfall CSV shared by every page.
+
+The raw HDX export is parsed once into a Parquet file under ``data/cache``.
+The cache is rebuilt automatically when the size or modification time of the
+source CSV changes, and the loaded frame is kept in process memory so every
+Streamlit session reads the same copy. Columns are stored with compact dtypes
+(``STORE_DTYPES``); the bytes saved are recorded in the store metadata.
+"""
+import json
+import os
+import threading
+
+import pandas as pd
+
+from utils.instrumentation import timed
+
+RAW_CSV = "data/bgd-rainfall-adm2-full.csv"
+SHAPEFILE = "data/adm2Shape/bgd_admbnda_adm2_bbs_20201113.shp"
+CACHE_DIR = "data/cache"
+STORE_PATH = os.path.join(CACHE_DIR, "rainfall.parquet")
+STORE_META = os.path.join(CACHE_DIR, "rainfall.json")
+
+# Bump when the stored columns or dtypes change so old stores are rebuilt
+STORE_SCHEMA = 2
+STORE_DTYPES = {
+    "ADM2_PCODE": "category",
+    "ADM2_EN": "category",
+    "year": "int16",
+    "month": "int8",
+    "rfh": "float32",
+}
+
+_SOURCE_COLUMNS = ["date", "ADM2_PCODE", "ADM2_EN", "rfh"]
+
+_lock = threading.Lock()
+_frames = {}
+
+
+def source_fingerprint(csv_path=RAW_CSV):
+    """Cheap change marker for the source CSV (size + mtime)."""
+    stat = os.stat(csv_path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def _read_meta(meta_path=STORE_META):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _attach_district_names(df, shapefile=SHAPEFILE):
+    if "ADM2_EN" in df.columns:
+        return df
+    import geopandas as gpd
+
+    with timed("shapefile.read_attributes"):
+        names = gpd.read_file(shapefile, ignore_geometry=True)[["ADM2_PCODE", "ADM2_EN"]]
+    return df.merge(names, on="ADM2_PCODE", how="left")
+
+
+def parse_rainfall_csv(csv_path=RAW_CSV, shapefile=SHAPEFILE):
+    """Parse and clean the raw CSV into the store schema."""
+    df = pd.read_csv(csv_path, usecols=lambda c: c in _SOURCE_COLUMNS, dtype={"ADM2_PCODE": str}, low_memory=False)
+
+    # The HDX export carries an HXL tag row ("#date", "#adm2+code", ...) under the header
+    df = df[~df["date"].astype(str).str.startswith("#")]
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df = df.dropna(subset=["date", "ADM2_PCODE"])
+    df["rfh"] = pd.to_numeric(df["rfh"], errors="coerce")
+    df = _attach_district_names(df, shapefile)
+
+    df = df.sort_values(["ADM2_PCODE", "date"], kind="mergesort").reset_index(drop=True)
+    df["year"] = df["date"].dt.year
+    df["month"] = df["date"].dt.month
+    return df[["date", "ADM2_PCODE", "ADM2_EN", "year", "month", "rfh"]]
+
+
+def compact_frame(df):
+    """Cast the store columns present in ``df`` to ``STORE_DTYPES``."""
+    return df.astype({col: dtype for col, dtype in STORE_DTYPES.items() if col in df.columns})
+
+
+def memory_report(before, after):
+    """Deep memory usage per column before and after compaction, in bytes."""
+    before_bytes = before.memory_usage(index=False, deep=True)
+    after_bytes = after.memory_usage(index=False, deep=True)
+    return {
+        "columns": {col: [int(before_bytes[col]), int(after_bytes[col])] for col in after.columns},
+        "bytes_before": int(before_bytes.sum()),
+        "bytes_after": int(after_bytes.sum()),
+        "bytes_saved": int(before_bytes.sum() - after_bytes.sum()),
+    }
+
+
+@timed("store.build")
+def build_store(csv_path=RAW_CSV, store_path=STORE_PATH, meta_path=STORE_META):
+    """Convert the CSV into the Parquet store and record its source fingerprint."""
+    fingerprint = source_fingerprint(csv_path)
+    parsed = parse_rainfall_csv(csv_path)
+    df = compact_frame(parsed)
+    report = memory_report(parsed, df)
+    del parsed
+
+    os.makedirs(os.path.dirname(store_path), exist_ok=True)
+    tmp_path = store_path + ".tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, store_path)
+    with open(meta_path, "w") as f:
+        json.dump({
+            "source": csv_path,
+            "fingerprint": fingerprint,
+            "schema": STORE_SCHEMA,
+            "rows": len(df),
+            "memory": report,
+        }, f)
+    return df
+
+
+def load_rainfall(csv_path=RAW_CSV, store_path=STORE_PATH, meta_path=STORE_META):
+    """Return the cleaned rainfall frame, rebuilding the cache if the CSV changed.
+
+    The returned frame is shared by all callers in the process; copy it before
+    adding or modifying columns.
+    """
+    fingerprint = source_fingerprint(csv_path)
+    key = (store_path, fingerprint)
+    with _lock:
+        if key in _frames:
+            return _frames[key]
+        meta = _read_meta(meta_path)
+        if meta.get("fingerprint") == fingerprint and meta.get("schema") == STORE_SCHEMA and os.path.exists(store_path):
+            with timed("store.read_parquet"):
+                df = pd.read_parquet(store_path)
+        else:
+            df = build_store(csv_path, store_path, meta_path)
+        _frames.clear()
+        _frames[key] = df
+        return df
+
+
+def append_rows(rows, csv_path=RAW_CSV, store_path=STORE_PATH, meta_path=STORE_META):
+    """Append parsed rows (date, ADM2_PCODE, rfh) to the CSV and the store.
+
+    The rows are written to the end of the source CSV and merged into the
+    existing store, whose metadata is moved to the new CSV fingerprint, so the
+    history is not parsed again. PCODEs must already be in the store.
+    """
+    current = load_rainfall(csv_path, store_path, meta_path)
+
+    header = pd.read_csv(csv_path, nrows=0).columns
+    raw = rows.assign(date=rows["date"].dt.strftime("%Y-%m-%d")).reindex(columns=header)
+    # Make sure the appended rows start on a new line
+    with open(csv_path, "rb+") as f:
+        if f.seek(0, os.SEEK_END):
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    raw.to_csv(csv_path, mode="a", header=False, index=False)
+    fingerprint = source_fingerprint(csv_path)
+
+    names = dict(zip(current["ADM2_PCODE"].astype(str), current["ADM2_EN"]))
+    new = pd.DataFrame({
+        "date": rows["date"].to_numpy(),
+        "ADM2_PCODE": pd.Categorical(rows["ADM2_PCODE"].astype(str), categories=current["ADM2_PCODE"].cat.categories),
+        "ADM2_EN": pd.Categorical(rows["ADM2_PCODE"].astype(str).map(names), categories=current["ADM2_EN"].cat.categories),
+        "year": rows["date"].dt.year.to_numpy(),
+        "month": rows["date"].dt.month.to_numpy(),
+        "rfh": rows["rfh"].to_numpy(),
+    })
+    df = pd.concat([current, compact_frame(new)], ignore_index=True)
+    df = df.sort_values(["ADM2_PCODE", "date"], kind="mergesort").reset_index(drop=True)
+
+    tmp_path = store_path + ".tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, store_path)
+    meta = _read_meta(meta_path)
+    meta.update({"source": csv_path, "fingerprint": fingerprint, "schema": STORE_SCHEMA, "rows": len(df)})
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    with _lock:
+        _frames.clear()
+        _frames[(store_path, fingerprint)] = df
+    return df
+
+
+def data_version(csv_path=RAW_CSV):
+    """Identifier of the data currently served by the store."""
+    return source_fingerprint(csv_path)
+
+
+def store_memory_report(meta_path=STORE_META):
+    """Bytes saved by the compact schema, as recorded when the store was built."""
+    load_rainfall(meta_path=meta_path)
+    return _read_meta(meta_path).get("memory", {})
+
+
+def list_districts(csv_path=RAW_CSV):
+    return sorted(load_rainfall(csv_path)["ADM2_EN"].dropna().unique())
@@ -0,0 +1,105 @@
+"""Row ranges of each district in the sorted rainfall store.
+
+The store is sorted by ``ADM2_PCODE`` and date, so every district occupies
+one contiguous block of rows. ``DistrictIndex`` records those blocks once and
+maps district names and PCODEs to them, so a per-district slice is a
+positional ``iloc`` instead of a boolean mask over the whole frame. It is
+built from the store alone; the geometry table is only read when a map asks
+for geometry order.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.data_store import data_version, load_rainfall
+
+_lock = threading.Lock()
+_indexes = {}
+
+
+class DistrictIndex:
+    def __init__(self, pcodes, starts, stops, names, geo_pcodes=None):
+        self.pcodes = pcodes
+        self.starts = starts
+        self.stops = stops
+        self.names = names
+        self._position = {p: i for i, p in enumerate(pcodes)}
+        # Names missing from the shapefile stay reachable by PCODE only
+        self._by_name = {n: i for i, n in enumerate(names) if isinstance(n, str)}
+        self._geo_pcodes = None if geo_pcodes is None else np.asarray(geo_pcodes, dtype=str)
+
+    @classmethod
+    def from_frame(cls, df, geo_pcodes=None):
+        """Index a frame sorted by ``ADM2_PCODE`` (as the store is)."""
+        pcodes = df['ADM2_PCODE']
+        codes = pcodes.cat.codes.to_numpy() if isinstance(pcodes.dtype, pd.CategoricalDtype) else pd.factorize(pcodes)[0]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.array([], dtype=np.int64)
+        if len(np.unique(codes)) != len(starts):
+            raise ValueError("Frame must be sorted by ADM2_PCODE to build a district index")
+        stops = np.r_[starts[1:], len(codes)].astype(np.int64)
+        names = df['ADM2_EN'].to_numpy()[starts] if 'ADM2_EN' in df.columns else np.full(len(starts), None)
+        return cls(pcodes.to_numpy()[starts].astype(str), starts, stops, list(names), geo_pcodes)
+
+    @property
+    def districts(self):
+        return sorted(self._by_name)
+
+    def __contains__(self, district):
+        return district in self._by_name or district in self._position
+
+    def position(self, district):
+        """Index position of a district given by name or PCODE."""
+        if district in self._by_name:
+            return self._by_name[district]
+        if district in self._position:
+            return self._position[district]
+        raise KeyError(f"Unknown district: {district}")
+
+    def pcode(self, district):
+        return self.pcodes[self.position(district)]
+
+    def name(self, district):
+        return self.names[self.position(district)]
+
+    def rows(self, district):
+        i = self.position(district)
+        return slice(int(self.starts[i]), int(self.stops[i]))
+
+    def slice(self, df, district):
+        """Rows of ``district`` in ``df`` (the frame this index was built from)."""
+        return df.iloc[self.rows(district)]
+
+    def _geo(self):
+        # Read on first use, so forecasting and the CLIs never need the shapefile geometry
+        if self._geo_pcodes is None:
+            from utils.geo_assets import load_district_table
+
+            self._geo_pcodes = np.asarray(load_district_table()['ADM2_PCODE'].to_numpy(), dtype=str)
+        return self._geo_pcodes
+
+    def geo_positions(self, pcodes=None):
+        """Row of each PCODE in the geometry table (-1 where it has no geometry)."""
+        pcodes = self.pcodes if pcodes is None else np.asarray(pcodes, dtype=str)
+        geo_pcodes = self._geo()
+        if not len(geo_pcodes):
+            return np.full(len(pcodes), -1)
+        pos = np.searchsorted(geo_pcodes, pcodes).clip(max=len(geo_pcodes) - 1)
+        return np.where(geo_pcodes[pos] == pcodes, pos, -1)
+
+    def to_geo(self, values, pcodes=None, fill=0.0):
+        """Reorder per-district ``values`` into geometry-table order."""
+        rows = self.geo_positions(pcodes)
+        out = np.full(len(self._geo()), fill, dtype=float)
+        out[rows[rows >= 0]] = np.asarray(values, dtype=float)[rows >= 0]
+        return out
+
+
+def load_index():
+    """District index of the shared store for the current data version."""
+    version = data_version()
+    with _lock:
+        if version not in _indexes:
+            _indexes.clear()
+            _indexes[version] = DistrictIndex.from_frame(load_rainfall())
+        return _indexes[version]
@@ -0,0 +1,48 @@
+"""Test-set loading and accuracy metrics shared by the Models page and the CLI."""
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+TEST_DATA = "data/test_data.csv"
+PROPHET_TEST_DATA = "data/prophet_test_data.csv"
+# Per-district splits written by `generate_test_data.py --all-districts`
+PANEL_DIR = "data/test_panel"
+
+
+def read_test_data(test_data_path=TEST_DATA):
+    if os.path.isdir(test_data_path):
+        df = pd.read_parquet(test_data_path, filters=[('split', '==', 'test')])
+        return df.drop(columns=['split', 'ADM2_PCODE'])
+    return pd.read_csv(test_data_path)
+
+
+def load_feature_test_data(predictor, test_data_path=TEST_DATA):
+    """Feature matrix in the predictor's order and the true ``rfh`` values."""
+    df = read_test_data(test_data_path)
+    if "rfh" not in df.columns:
+        raise ValueError("Test data must contain 'rfh' column")
+    y_true = df["rfh"]
+    X_test_full = df.drop(columns=["rfh", "date"], errors='ignore')
+    # Resolve the model's feature order once; absent columns (e.g. season dummies) become 0
+    X_test = predictor.matrix({col: X_test_full[col].to_numpy() for col in X_test_full.columns})
+    return X_test, y_true
+
+
+def load_prophet_test_data(test_data_path=PROPHET_TEST_DATA):
+    df = pd.read_csv(test_data_path)
+    df['ds'] = pd.to_datetime(df['ds'], errors='coerce')
+    return df.dropna()
+
+
+def regression_metrics(y_true, y_pred):
+    """MAE, RMSE, R² and the dashboard's "Accuracy" (100 - MAE as % of mean rainfall)."""
+    mae = mean_absolute_error(y_true, y_pred)
+    mean_true = np.mean(y_true)
+    return {
+        'mae': float(mae),
+        'rmse': float(np.sqrt(mean_squared_error(y_true, y_pred))),
+        'r2': float(r2_score(y_true, y_pred)),
+        'accuracy': float(100 - (mae / mean_true * 100)) if mean_true != 0 else 0.0,
+    }
@@ -0,0 +1,315 @@
+"""Feature definitions for the rainfall models, shared offline and online.
+
+All features are computed with NumPy over district-contiguous arrays, so a
+whole chunk of rows is processed in one pass. ``StreamingFeatureBuilder``
+carries the trailing window of every district between chunks, which lets
+``generate_test_data.py --stream`` handle files that do not fit in memory.
+``load_feature_table`` persists the features of every district for the
+current data version, and ``step_features`` applies the same calendar and
+climatology definitions to one step of the recursive forecast.
+
+Feature versions (``FEATURE_VERSION``):
+
+1. The original single-district ``generate_test_data.py`` output, which the
+   shipped models in ``model/`` and ``data/test_data.csv`` use:
+   ``time_idx`` is months since December 1980 (``(year - 1981) * 12 +
+   month``), ``month_avg_rfh`` is the mean over all districts for the
+   calendar month, and ``season_Monsoon`` is always 0 (it was the dropped
+   dummy).
+2. Every mode now (single district, ``--stream``, ``--all-districts``):
+   ``time_idx`` is months since December 2024 (``(year - 2025) * 12 +
+   month``), the encoding the recursive forecast has always used;
+   ``month_avg_rfh`` is the district's own mean for the calendar month, as in
+   the recursive forecast, and the season dummies are a full one-hot
+   encoding. Models fitted on version 1 see different ``time_idx`` and
+   ``month_avg_rfh`` values here; retrain (``train_models.py``) to fit on
+   version 2. ``data/test_data.csv`` is evaluated as shipped, in version 1.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.data_store import CACHE_DIR, data_version, load_rainfall
+
+# Bump when a definition changes so persisted feature tables are rebuilt
+FEATURE_VERSION = 2
+FEATURE_DIR = os.path.join(CACHE_DIR, "features")
+TIME_ORIGIN = 2025
+
+SEASON_MAPPING = {
+    12: "Winter", 1: "Winter", 2: "Winter",
+    3: "Summer", 4: "Summer", 5: "Summer",
+    6: "Monsoon", 7: "Monsoon", 8: "Monsoon", 9: "Monsoon",
+    10: "Post-Monsoon", 11: "Post-Monsoon"
+}
+MONSOON_MONTHS = [6, 7, 8, 9]
+
+SELECTED_FEATURES = [
+    'year', 'month', 'quarter', 'is_monsoon',
+    'rfh_lag1', 'rfh_lag2', 'rfh_roll3', 'rfh_roll6', 'rfh_diff',
+    'sin_month', 'cos_month', 'month_avg_rfh', 'time_idx',
+    'season_Monsoon', 'season_Post-Monsoon', 'season_Summer'
+]
+
+# Column order the shipped models in model/ were fitted with (as in data/test_data.csv)
+MODEL_FEATURES = [
+    'year', 'month', 'quarter', 'is_monsoon', 'time_idx',
+    'rfh_lag1', 'rfh_lag2', 'rfh_roll3', 'rfh_roll6', 'rfh_diff',
+    'season_Post-Monsoon', 'season_Summer', 'season_Winter',
+    'sin_month', 'cos_month', 'month_avg_rfh'
+]
+
+# Every feature column: what the feature table stores
+FEATURE_COLUMNS = MODEL_FEATURES + ['season_Monsoon']
+
+# Rows of history needed before the current one (rfh_roll6 spans 6 rows)
+HISTORY_ROWS = 5
+
+_lock = threading.Lock()
+_tables = {}
+
+
+def time_index(year, month):
+    """Months since December 2024 (feature version 2; version 1 counted from December 1980)."""
+    return (np.asarray(year) - TIME_ORIGIN) * 12 + np.asarray(month)
+
+
+def calendar_columns(year, month):
+    """Calendar features for arrays of years and months (1-12)."""
+    year = np.asarray(year)
+    month = np.asarray(month)
+    season = pd.Series(month).map(SEASON_MAPPING).to_numpy()
+    return {
+        'year': year,
+        'month': month,
+        'quarter': (month - 1) // 3 + 1,
+        'is_monsoon': np.isin(month, MONSOON_MONTHS).astype(np.int64),
+        'sin_month': np.sin(2 * np.pi * month / 12),
+        'cos_month': np.cos(2 * np.pi * month / 12),
+        'season_Monsoon': season == "Monsoon",
+        'season_Post-Monsoon': season == "Post-Monsoon",
+        'season_Summer': season == "Summer",
+        'season_Winter': season == "Winter",
+        'time_idx': time_index(year, month),
+    }
+
+
+def calendar_features(dates, month_avg):
+    """Date-derived features; ``month_avg`` holds each row's calendar-month mean."""
+    features = calendar_columns(dates.dt.year.to_numpy(), dates.dt.month.to_numpy())
+    features['month_avg_rfh'] = np.asarray(month_avg, dtype=np.float64)
+    return features
+
+
+def month_climatology(groups, month, rfh, n_groups):
+    """Mean rfh per (group, calendar month) as an (n_groups, 13) array; column 0 is unused."""
+    cells = np.asarray(groups, dtype=np.int64) * 13 + np.asarray(month, dtype=np.int64)
+    sums = np.bincount(cells, weights=np.asarray(rfh, dtype=np.float64), minlength=n_groups * 13)
+    counts = np.bincount(cells, minlength=n_groups * 13)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (sums / counts).reshape(n_groups, 13)
+
+
+def _shift(values, groups, k):
+    out = np.full(len(values), np.nan)
+    if k < len(values):
+        same = groups[k:] == groups[:-k]
+        out[k:] = np.where(same, values[:-k], np.nan)
+    return out
+
+
+def window_features(groups, rfh):
+    """Lag, rolling-mean and diff features for district-contiguous rows.
+
+    ``groups`` holds one integer code per row; rows of a district must be
+    adjacent and in time order. Windows never cross district boundaries.
+    """
+    rfh = np.asarray(rfh, dtype=np.float64)
+    lags = [_shift(rfh, groups, k) for k in range(1, HISTORY_ROWS + 1)]
+    return {
+        'rfh_lag1': lags[0],
+        'rfh_lag2': lags[1],
+        'rfh_roll3': (rfh + lags[0] + lags[1]) / 3,
+        'rfh_roll6': (rfh + sum(lags)) / 6,
+        'rfh_diff': rfh - lags[0],
+    }
+
+
+def step_features(buffer, month_avg_val, date):
+    """Feature columns for one recursive forecast step, one entry per buffer row.
+
+    ``date`` is the step's date, or a DatetimeIndex with one date per row.
+    The lags come from the values already in ``buffer`` (the step's inputs);
+    windows that are not full yet fall back to the shorter ones.
+    """
+    counts = buffer.counts
+    n = len(counts)
+    lag1 = np.where(counts >= 1, buffer.last(1), 0.0)
+    lag2 = np.where(counts >= 2, buffer.last(2), 0.0)
+    roll3 = np.where(counts >= 3, buffer.mean_last(3), lag1)
+    roll6 = np.where(counts >= 6, buffer.mean_last(6), roll3)
+
+    calendar = calendar_columns(np.atleast_1d(date.year), np.atleast_1d(date.month))
+    features = {name: np.broadcast_to(np.asarray(value, dtype=float), (n,)) for name, value in calendar.items()}
+    features.update({
+        'rfh_lag1': lag1,
+        'rfh_lag2': lag2,
+        'rfh_roll3': roll3,
+        'rfh_roll6': roll6,
+        'rfh_diff': np.where(counts > 1, lag1 - lag2, 0.0),
+        'month_avg_rfh': month_avg_val,
+    })
+    return features
+
+
+def clean_rainfall_rows(df):
+    """Parse ``date``/``rfh`` and drop unusable rows (including the HXL tag row)."""
+    df = df[~df['date'].astype(str).str.startswith('#')].copy()
+    df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    df['rfh'] = pd.to_numeric(df['rfh'], errors='coerce')
+    return df.dropna(subset=['date', 'rfh'])
+
+
+def monthly_means(chunks):
+    """Mean rfh per district and calendar month over cleaned chunks: {ADM2_PCODE: array(13)}.
+
+    Per district, unlike the all-district mean of feature version 1 (see the module notes).
+    """
+    sums, counts = {}, {}
+    for chunk in chunks:
+        codes, groups = np.unique(np.asarray(chunk['ADM2_PCODE'].astype(str), dtype=str), return_inverse=True)
+        cells = groups * 13 + chunk['date'].dt.month.to_numpy()
+        chunk_sums = np.bincount(cells, weights=chunk['rfh'].to_numpy(dtype=np.float64), minlength=len(codes) * 13)
+        chunk_counts = np.bincount(cells, minlength=len(codes) * 13)
+        for i, code in enumerate(codes):
+            sums[code] = sums.get(code, 0) + chunk_sums[i * 13:(i + 1) * 13]
+            counts[code] = counts.get(code, 0) + chunk_counts[i * 13:(i + 1) * 13]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {code: sums[code] / counts[code] for code in sums}
+
+
+def district_feature_frame(df, month_avg, columns=SELECTED_FEATURES):
+    """Features for one district's cleaned rows; ``month_avg`` is indexed by calendar month."""
+    df = df.reset_index(drop=True)
+    month_avg = np.asarray(month_avg, dtype=np.float64)[df['date'].dt.month.to_numpy()]
+    out = pd.DataFrame(calendar_features(df['date'], month_avg))
+    for name, values in window_features(np.zeros(len(df), dtype=np.int64), df['rfh']).items():
+        out[name] = values
+    out['rfh'] = df['rfh'].to_numpy(dtype=np.float64)
+    out['date'] = df['date'].to_numpy()
+    out = out[['date'] + list(columns) + ['rfh']]
+    return out.dropna().reset_index(drop=True)
+
+
+def build_feature_table(store, columns=FEATURE_COLUMNS):
+    """Features of every district in one vectorized pass over the (PCODE, date)-sorted store."""
+    store = store[store['rfh'].notna()]
+    groups = store['ADM2_PCODE'].cat.codes.to_numpy(dtype=np.int64)
+    month = store['month'].to_numpy(dtype=np.int64)
+    rfh = store['rfh'].to_numpy(dtype=np.float64)
+    climatology = month_climatology(groups, month, rfh, len(store['ADM2_PCODE'].cat.categories))
+
+    out = pd.DataFrame(calendar_features(store['date'], climatology[groups, month]))
+    for name, values in window_features(groups, rfh).items():
+        out[name] = values
+    out['rfh'] = rfh
+    out['date'] = store['date'].to_numpy()
+    out['ADM2_PCODE'] = store['ADM2_PCODE'].to_numpy()
+    out = out[['ADM2_PCODE', 'date'] + list(columns) + ['rfh']]
+    return out.dropna().reset_index(drop=True)
+
+
+def _table_paths(feature_dir):
+    return (os.path.join(feature_dir, f"features_v{FEATURE_VERSION}.parquet"),
+            os.path.join(feature_dir, f"features_v{FEATURE_VERSION}.json"))
+
+
+def load_feature_table(feature_dir=FEATURE_DIR):
+    """Feature table of the current store, built once per data and feature version.
+
+    Shared by all callers in the process; copy before modifying.
+    """
+    version = data_version()
+    path, meta_path = _table_paths(feature_dir)
+    with _lock:
+        if version in _tables:
+            return _tables[version]
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+        if meta.get("data_version") == version and os.path.exists(path):
+            table = pd.read_parquet(path)
+        else:
+            table = build_feature_table(load_rainfall())
+            os.makedirs(feature_dir, exist_ok=True)
+            tmp_path = path + ".tmp"
+            table.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+            with open(meta_path, "w") as f:
+                json.dump({"data_version": version, "feature_version": FEATURE_VERSION,
+                           "rows": len(table), "columns": list(table.columns)}, f)
+        _tables.clear()
+        _tables[version] = table
+        return table
+
+
+class StreamingFeatureBuilder:
+    """Compute features chunk by chunk, carrying each district's recent rows.
+
+    Rows of one district must arrive in time order across chunks, as they do
+    in the HDX export; districts may be interleaved. ``month_avg`` maps each
+    PCODE to its calendar-month means (see ``monthly_means``).
+    """
+
+    def __init__(self, month_avg, columns=SELECTED_FEATURES):
+        self.month_avg = month_avg
+        self.columns = columns
+        self.carry = {}
+
+    def transform(self, chunk):
+        """Feature rows for a cleaned chunk; rows without a full window are dropped."""
+        n = len(chunk)
+        if n == 0:
+            return pd.DataFrame(columns=['ADM2_PCODE', 'date'] + list(self.columns) + ['rfh'])
+        codes = np.asarray(chunk['ADM2_PCODE'].astype(str), dtype=str)
+        rfh = chunk['rfh'].to_numpy(dtype=np.float64)
+
+        carried_codes = [code for code in pd.unique(codes) if code in self.carry]
+        carried_rfh = [self.carry[code] for code in carried_codes]
+        all_codes = np.concatenate([np.repeat(np.asarray(carried_codes, dtype=str), [len(v) for v in carried_rfh]), codes])
+        all_rfh = np.concatenate(carried_rfh + [rfh]) if carried_rfh else rfh
+
+        # Carried rows sort ahead of the chunk within their district (stable sort)
+        order = np.argsort(all_codes, kind='stable')
+        groups = np.unique(all_codes[order], return_inverse=True)[1]
+        windows = window_features(groups, all_rfh[order])
+
+        n_carried = len(all_rfh) - n
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+        chunk_rows = position[n_carried:]
+
+        dates = chunk['date'].reset_index(drop=True)
+        chunk_codes, inverse = np.unique(codes, return_inverse=True)
+        climatology = np.stack([self.month_avg.get(code, np.full(13, np.nan)) for code in chunk_codes])
+        out = pd.DataFrame(calendar_features(dates, climatology[inverse, dates.dt.month.to_numpy()]))
+        for name, values in windows.items():
+            out[name] = values[chunk_rows]
+        out['rfh'] = rfh
+        out['date'] = chunk['date'].to_numpy()
+        out['ADM2_PCODE'] = codes
+
+        sorted_codes = all_codes[order]
+        sorted_rfh = all_rfh[order]
+        ends = np.flatnonzero(np.r_[sorted_codes[1:] != sorted_codes[:-1], True])
+        starts = np.r_[0, ends[:-1] + 1]
+        for start, end in zip(starts, ends):
+            self.carry[sorted_codes[start]] = sorted_rfh[max(start, end + 1 - HISTORY_ROWS):end + 1].copy()
+
+        out = out[['ADM2_PCODE', 'date'] + list(self.columns) + ['rfh']]
+        return out.dropna().reset_index(drop=True)
@@ -0,0 +1,173 @@
+"""Request coalescing in front of the vectorized forecast engine.
+
+Callers submit (districts, models) requests from any thread. A single worker
+thread waits a few milliseconds to collect concurrent requests, then runs one
+batched recursion per model over the union of the districts that are not
+cached yet. Results are kept in an in-memory LRU and written through to the
+on-disk ``ForecastCache`` that the dashboard reads. With ``follow_data`` the
+batcher reloads the store when its data version changes (after an ingest), so
+a long-running service never serves forecasts from a replaced history.
+"""
+import queue
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future
+
+from utils.data_store import data_version, load_rainfall
+from utils.district_index import DistrictIndex, load_index
+from utils.forecast_cache import ForecastCache, file_hash, history_hash
+from utils.forecast_engine import FORECAST_DATES, build_state, recursive_forecast
+from utils.model_registry import get_predictor, model_path
+
+
+class ForecastBatcher:
+    def __init__(self, history, window_s=0.02, max_entries=4096, disk_cache=None, future_dates=FORECAST_DATES, index=None,
+                 follow_data=False):
+        self.window_s = window_s
+        self.max_entries = max_entries
+        self.disk_cache = ForecastCache() if disk_cache is None else disk_cache
+        self.future_dates = future_dates
+        self.stats = defaultdict(int)
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._reload_lock = threading.Lock()
+        self.follow_data = follow_data
+        self._version = data_version() if follow_data else None
+        self._load(history, index)
+        self._worker = threading.Thread(target=self._run, name="forecast-batcher", daemon=True)
+        self._worker.start()
+
+    def _load(self, history, index):
+        self.history = history
+        self.index = DistrictIndex.from_frame(history) if index is None else index
+        self._districts = {
+            name: (self.index.pcode(name), history_hash(self.index.slice(history, name)))
+            for name in self.index.districts
+        }
+
+    def _refresh(self):
+        # The history hashes are part of every key, so entries of the old data are never served
+        if not self.follow_data:
+            return
+        with self._reload_lock:
+            version = data_version()
+            if version != self._version:
+                self._load(load_rainfall(), load_index())
+                self._version = version
+                self.stats['reloads'] += 1
+
+    @property
+    def districts(self):
+        self._refresh()
+        return sorted(self._districts)
+
+    def submit(self, districts, models):
+        """Future resolving to {model: {district: forecast array}}."""
+        self._refresh()
+        unknown = [d for d in districts if d not in self._districts]
+        if unknown:
+            raise KeyError(f"Unknown district(s): {', '.join(unknown)}")
+        future = Future()
+        self._queue.put((list(districts), list(models), future))
+        return future
+
+    def forecast(self, districts, models, timeout=None):
+        return self.submit(districts, models).result(timeout)
+
+    def close(self):
+        """Stop the worker thread once the requests already queued are served."""
+        self._queue.put(None)
+        self._worker.join()
+
+    def _key(self, district, model_name, model_hash):
+        return district, model_name, model_hash, self._districts[district][1]
+
+    def _remember(self, key, values):
+        with self._lock:
+            self._memory[key] = values
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _lookup(self, key):
+        with self._lock:
+            values = self._memory.get(key)
+            if values is not None:
+                self._memory.move_to_end(key)
+                return values
+        district, model_name, model_hash, data_hash = key
+        pcode = self._districts[district][0]
+        values = self.disk_cache.get(pcode, model_name, model_hash, data_hash, self.future_dates)
+        if values is not None:
+            self._remember(key, values)
+        return values
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            # None is the stop sentinel put by close()
+            request = self._queue.get()
+            if request is None:
+                return
+            batch = [request]
+            deadline = time.monotonic() + self.window_s
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+            self._process(batch)
+
+    def _process(self, batch):
+        self._refresh()
+        self.stats['requests'] += len(batch)
+        self.stats['batches'] += 1
+        model_hashes, missing, failed = {}, defaultdict(set), {}
+
+        for districts, models, _ in batch:
+            for name in models:
+                try:
+                    model_hashes.setdefault(name, file_hash(model_path(name)))
+                except Exception as e:
+                    failed[name] = e
+                    continue
+                for district in districts:
+                    if self._lookup(self._key(district, name, model_hashes[name])) is None:
+                        missing[name].add(district)
+                    else:
+                        self.stats['cache_hits'] += 1
+
+        for name, districts in missing.items():
+            try:
+                state = build_state(self.history, sorted(districts), index=self.index)
+                values = recursive_forecast(state, get_predictor(name), name, self.future_dates)
+            except Exception as e:
+                failed[name] = e
+                continue
+            self.stats['model_calls'] += len(self.future_dates)
+            self.stats['computed'] += len(state.districts)
+            for i, district in enumerate(state.districts):
+                key = self._key(district, name, model_hashes[name])
+                pcode, data_hash = self._districts[district]
+                self.disk_cache.put(pcode, name, model_hashes[name], data_hash, self.future_dates, values[:, i])
+                self._remember(key, values[:, i])
+
+        for districts, models, future in batch:
+            errors = [failed[name] for name in models if name in failed]
+            if errors:
+                future.set_exception(errors[0])
+                continue
+            try:
+                future.set_result({
+                    name: {d: self._lookup(self._key(d, name, model_hashes[name])) for d in districts}
+                    for name in models
+                })
+            except Exception as e:
+                future.set_exception(e)
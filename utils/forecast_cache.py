@@ -0,0 +1,121 @@
+"""Persistent on-disk cache of recursive forecasts.
+
+Entries are keyed by district PCODE, model name, a hash of the model artifact,
+a hash of the district's history and the forecast horizon. Each entry is a
+small Parquet file; the directory is kept under a size cap by evicting the
+least recently used files.
+"""
+import glob
+import hashlib
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.data_store import CACHE_DIR
+
+FORECAST_CACHE_DIR = os.path.join(CACHE_DIR, "forecasts")
+DEFAULT_MAX_BYTES = int(os.environ.get("RAINFALL_FORECAST_CACHE_MB", "256")) * 1024 * 1024
+
+_hash_lock = threading.Lock()
+_file_hashes = {}
+
+
+def file_hash(path):
+    """SHA-256 of a file, memoised on its size and mtime."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _hash_lock:
+        if key in _file_hashes:
+            return _file_hashes[key]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    with _hash_lock:
+        _file_hashes[key] = digest.hexdigest()
+    return _file_hashes[key]
+
+
+def history_hash(history):
+    """Hash of one district's (date, rfh) history; rows without rainfall are ignored."""
+    history = history.dropna(subset=['rfh']).sort_values('date')
+    digest = hashlib.sha256()
+    digest.update(history['date'].to_numpy(dtype='datetime64[ns]').view(np.int64).tobytes())
+    digest.update(history['rfh'].to_numpy(dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def horizon_key(future_dates):
+    return f"{future_dates[0]:%Y-%m-%d}:{future_dates[-1]:%Y-%m-%d}:{len(future_dates)}"
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9]+", "-", str(text)).strip("-")
+
+
+class ForecastCache:
+    def __init__(self, root=FORECAST_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _prefix(self, pcode, model_name):
+        return f"{_slug(pcode)}__{_slug(model_name)}__"
+
+    def path(self, pcode, model_name, model_hash, data_hash, future_dates):
+        key = "|".join([str(pcode), model_name, model_hash, data_hash, horizon_key(future_dates)])
+        digest = hashlib.sha256(key.encode()).hexdigest()[:24]
+        return os.path.join(self.root, f"{self._prefix(pcode, model_name)}{digest}.parquet")
+
+    def get(self, pcode, model_name, model_hash, data_hash, future_dates):
+        """Return the cached forecast values, or None on a miss."""
+        path = self.path(pcode, model_name, model_hash, data_hash, future_dates)
+        try:
+            yhat = pd.read_parquet(path)['yhat']
+            os.utime(path)
+        except (OSError, KeyError, ValueError):
+            return None
+        # Entries written as float32 would not match a fresh forecast; recompute them
+        if yhat.dtype != np.float64 or len(yhat) != len(future_dates):
+            return None
+        return yhat.to_numpy()
+
+    def put(self, pcode, model_name, model_hash, data_hash, future_dates, values):
+        path = self.path(pcode, model_name, model_hash, data_hash, future_dates)
+        frame = pd.DataFrame({'date': future_dates, 'yhat': np.asarray(values, dtype=np.float64)})
+        with self._lock:
+            # Entries for the same district/model with an older model or history are stale
+            self.invalidate(pcode, model_name, keep=path)
+            tmp_path = path + ".tmp"
+            frame.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+            self._evict()
+
+    def invalidate(self, pcode, model_name=None, keep=None):
+        pattern = self._prefix(pcode, model_name) if model_name else f"{_slug(pcode)}__"
+        for path in glob.glob(os.path.join(self.root, glob.escape(pattern) + "*.parquet")):
+            if path != keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.root):
+            if entry.name.endswith(".parquet"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,256 @@
+"""Recursive multi-step rainfall forecasting for many districts at once.
+
+Every district's last observations live in a NumPy ring buffer, so each
+horizon step builds one (districts x features) matrix and issues a single
+``predict`` call per model instead of one call per district and month.
+Monte Carlo ensembles (``simulate_paths``) stack the paths as extra rows of
+the same batch.
+"""
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from utils.features import step_features
+from utils.predictors import Predictor
+
+FORECAST_DATES = pd.date_range(start="2025-01-01", end="2035-12-01", freq="MS")
+
+WINDOW = 6
+ALPHA = 0.7
+# (noise std, year-to-year multiplier spread) applied to each step's prediction
+NOISE_PARAMS = {"XGBoost": (2.5, 0.7)}
+DEFAULT_NOISE = (2.0, 0.5)
+# Seeded ensemble behind the 90% prediction interval, so a district/model/data
+# combination always gives the same band
+INTERVAL_PATHS = 200
+INTERVAL_SEED = 42
+
+
+class RingBuffer:
+    """Fixed-width window of the latest values for each row (district)."""
+
+    def __init__(self, values, counts):
+        self.values = values
+        self.counts = counts
+        self.head = 0
+        self.width = values.shape[1]
+
+    def copy(self):
+        buf = RingBuffer(self.values.copy(), self.counts.copy())
+        buf.head = self.head
+        return buf
+
+    def push(self, x):
+        self.values[:, self.head] = x
+        self.head = (self.head + 1) % self.width
+        np.minimum(self.counts + 1, self.width, out=self.counts)
+
+    def last(self, k):
+        return self.values[:, (self.head - k) % self.width]
+
+    def mean_last(self, k):
+        idx = (self.head - np.arange(1, k + 1)) % self.width
+        return self.values[:, idx].mean(axis=1)
+
+
+class DistrictState:
+    """Per-district inputs for the recursion: recent window and monthly climatology."""
+
+    def __init__(self, districts, buffer, month_avg):
+        self.districts = districts
+        self.buffer = buffer
+        self.month_avg = month_avg
+
+    def copy(self):
+        return DistrictState(list(self.districts), self.buffer.copy(), self.month_avg)
+
+
+def build_state(historical_data, districts=None, key='ADM2_EN', window=WINDOW, index=None):
+    """Collect the last ``window`` observations and month means of each district.
+
+    Districts without any history are left out of the returned state. With a
+    ``DistrictIndex`` of ``historical_data`` each district is read from its
+    row range instead of filtering and grouping the whole frame.
+    """
+    if index is not None:
+        return _state_from_index(historical_data, index, districts, key, window)
+    df = historical_data[['date', 'month', 'rfh', key]].dropna(subset=['rfh', key])
+    if districts is not None:
+        df = df[df[key].isin(districts)]
+    df = df.sort_values([key, 'date'], kind='mergesort')
+
+    present = pd.unique(df[key].astype(str))
+    if districts is not None:
+        present = [d for d in districts if d in set(present)]
+    else:
+        present = list(present)
+    row_of = {d: i for i, d in enumerate(present)}
+
+    tail = df.groupby(key, observed=True).tail(window)
+    rows = tail[key].astype(str).map(row_of).to_numpy()
+    counts = np.bincount(rows, minlength=len(present))
+    # right-align each district's tail so slot ``window - 1`` holds the latest value
+    pos = tail.groupby(key, observed=True).cumcount().to_numpy() + (window - counts[rows])
+    values = np.full((len(present), window), np.nan)
+    values[rows, pos] = tail['rfh'].to_numpy(dtype=float)
+
+    month_avg = (
+        df.groupby([df[key].astype(str), 'month'])['rfh'].mean()
+        .unstack()
+        .reindex(index=present, columns=range(1, 13))
+        .to_numpy(dtype=float)
+    )
+    return DistrictState(present, RingBuffer(values, counts.astype(np.int64)), month_avg)
+
+
+def _state_from_index(historical_data, index, districts, key, window):
+    labels = index.pcodes if key == 'ADM2_PCODE' else index.names
+    if districts is None:
+        districts = sorted(str(label) for label in labels if isinstance(label, str))
+    positions = [index.position(d) for d in districts if d in index]
+    rfh = historical_data['rfh'].to_numpy(dtype=float)
+    month = historical_data['month'].to_numpy()
+
+    present, values, counts, month_avg = [], [], [], []
+    for i in positions:
+        rows = slice(int(index.starts[i]), int(index.stops[i]))
+        r = rfh[rows]
+        observed = ~np.isnan(r)
+        r, m = r[observed], month[rows][observed] - 1
+        if not len(r) or not isinstance(labels[i], str):
+            continue
+        tail = np.full(window, np.nan)
+        tail[window - min(len(r), window):] = r[-window:]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            month_avg.append(np.bincount(m, r, minlength=12) / np.bincount(m, minlength=12))
+        present.append(str(labels[i]))
+        values.append(tail)
+        counts.append(min(len(r), window))
+
+    values = np.array(values).reshape(len(present), window)
+    month_avg = np.array(month_avg).reshape(len(present), 12)
+    return DistrictState(present, RingBuffer(values, np.array(counts, dtype=np.int64)), month_avg)
+
+
+def _month_weights(month_avg):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        month_weight = month_avg / np.nanmax(month_avg, axis=1, keepdims=True)
+    return np.where(np.isnan(month_avg), 1.0, month_weight)
+
+
+def _simulate(predictor, model_name, buffer, month_avg, future_dates, rng, noise=True):
+    """Advance every buffer row through ``future_dates``; returns (steps, rows).
+
+    Each step is a date shared by all rows or a DatetimeIndex with one date
+    per row. ``noise=False`` drops the random perturbations.
+    """
+    noise_std, year_spread = NOISE_PARAMS.get(model_name, DEFAULT_NOISE)
+    month_weight = _month_weights(month_avg)
+    month_avg = np.nan_to_num(month_avg, nan=0.0)
+
+    n = month_avg.shape[0]
+    rows = np.arange(n)
+    out = np.empty((len(future_dates), n))
+    for step, date in enumerate(future_dates):
+        month = np.asarray(date.month) - 1
+        month_avg_val = month_avg[rows, month]
+        features = step_features(buffer, month_avg_val, date)
+        pred = predictor.predict(predictor.matrix(features))
+
+        if noise:
+            shock = rng.normal(0, noise_std, n)
+            year_var = 1 + rng.uniform(-year_spread, year_spread, n)
+            pred = pred * year_var + shock
+        pred = (1 - ALPHA) * pred + ALPHA * month_avg_val * (month_weight[rows, month] ** 1.5)
+
+        out[step] = pred
+        buffer.push(pred)
+    return out
+
+
+def _as_predictor(model):
+    return model if isinstance(model, Predictor) else Predictor(model)
+
+
+def recursive_forecast(state, model, model_name, future_dates=FORECAST_DATES, rng=None, noise=True):
+    """Run the recursive forecast for every district in ``state`` with one model.
+
+    ``model`` is a fitted estimator or a ``Predictor``. ``noise=False`` gives
+    the deterministic forecast without the random perturbations. Returns an
+    array of shape (len(future_dates), len(state.districts)).
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    return _simulate(_as_predictor(model), model_name, state.buffer.copy(), state.month_avg, future_dates, rng,
+                     noise=noise)
+
+
+class _DistrictStreams:
+    """One generator per district, drawing in the (paths x districts) row order of ``simulate_paths``.
+
+    Each stream is seeded with ``seed`` and a stable hash of the district
+    label, so districts draw independent noise that does not depend on the
+    rest of the batch.
+    """
+
+    def __init__(self, seed, districts, n_paths):
+        base = np.random.SeedSequence(seed).entropy
+        self.rngs = [np.random.default_rng([base, zlib.crc32(str(d).encode())]) for d in districts]
+        self.n_paths = n_paths
+
+    def normal(self, loc, scale, size):
+        return np.column_stack([rng.normal(loc, scale, self.n_paths) for rng in self.rngs]).ravel()
+
+    def uniform(self, low, high, size):
+        return np.column_stack([rng.uniform(low, high, self.n_paths) for rng in self.rngs]).ravel()
+
+
+def simulate_paths(state, model, model_name, future_dates=FORECAST_DATES, n_paths=200, seed=None,
+                   per_district=False):
+    """Monte Carlo ensemble of ``n_paths`` noisy trajectories per district.
+
+    All paths of all districts advance together as one (paths x districts)
+    batch per step. With ``per_district`` each district draws from its own
+    generator, seeded from ``seed`` and the district, so its paths are the
+    same whichever districts share the batch. Returns an array of shape (steps, n_paths,
+    districts).
+    """
+    n = len(state.districts)
+    rng = _DistrictStreams(seed, state.districts, n_paths) if per_district else np.random.default_rng(seed)
+    buffer = RingBuffer(np.tile(state.buffer.values, (n_paths, 1)), np.tile(state.buffer.counts, n_paths))
+    buffer.head = state.buffer.head
+    month_avg = np.tile(state.month_avg, (n_paths, 1))
+    out = _simulate(_as_predictor(model), model_name, buffer, month_avg, future_dates, rng)
+    return out.reshape(len(future_dates), n_paths, n)
+
+
+def quantile_bands(paths, quantiles=(0.05, 0.5, 0.95)):
+    """Per-step quantiles across paths: {q: array of shape (steps, districts)}."""
+    values = np.quantile(paths, quantiles, axis=1)
+    return dict(zip(quantiles, values))
+
+
+def prediction_interval(state, model, model_name, future_dates=FORECAST_DATES):
+    """5% and 95% bands of the seeded ensemble, each of shape (steps, districts).
+
+    A district gets the same bands alone or batched with others.
+    """
+    paths = simulate_paths(state, model, model_name, future_dates, n_paths=INTERVAL_PATHS, seed=INTERVAL_SEED,
+                           per_district=True)
+    bands = quantile_bands(paths, (0.05, 0.95))
+    return bands[0.05], bands[0.95]
+
+
+def forecast_districts(historical_data, models, districts=None, future_dates=FORECAST_DATES, key='ADM2_EN', rng=None):
+    """Forecast ``districts`` (all when None) with every model in ``models``.
+
+    ``models`` maps model name to a fitted estimator or ``Predictor``.
+    Returns a dict of model name to a DataFrame indexed by date with one
+    column per district.
+    """
+    state = build_state(historical_data, districts, key=key)
+    results = {}
+    for name, model in models.items():
+        values = recursive_forecast(state, model, name, future_dates, rng=rng)
+        results[name] = pd.DataFrame(values, index=future_dates, columns=state.districts)
+    return results
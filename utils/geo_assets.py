@@ -0,0 +1,99 @@
+"""Simplified, pre-serialized ADM2 geometry for the choropleth maps.
+
+The shapefile is read once and written as GeoJSON at a few simplification
+levels, with one feature per district keyed by ``ADM2_PCODE``. Pages load the
+ready-made dict and only supply the per-district ``z`` values.
+"""
+import json
+import os
+import threading
+
+import pandas as pd
+
+from utils.data_store import CACHE_DIR, SHAPEFILE, source_fingerprint
+from utils.instrumentation import timed
+
+GEO_DIR = os.path.join(CACHE_DIR, "geo")
+GEO_META = os.path.join(GEO_DIR, "geo.json")
+DISTRICT_TABLE = os.path.join(GEO_DIR, "districts.parquet")
+
+# Simplification tolerance in degrees for each detail level
+TOLERANCES = {"high": 0.001, "medium": 0.005, "low": 0.01}
+DEFAULT_LEVEL = "medium"
+
+_lock = threading.Lock()
+_loaded = {}
+
+
+def _geojson_path(level):
+    return os.path.join(GEO_DIR, f"adm2_{level}.geojson")
+
+
+def _simplify(geometry, tolerance):
+    import shapely
+
+    # coverage_simplify keeps shared district borders identical (shapely >= 2.1)
+    if hasattr(shapely, "coverage_simplify"):
+        return shapely.coverage_simplify(geometry.values, tolerance)
+    return geometry.simplify(tolerance, preserve_topology=True).values
+
+
+@timed("geo.build_assets")
+def build_geo_assets(shapefile=SHAPEFILE, out_dir=GEO_DIR):
+    import geopandas as gpd
+
+    gdf = gpd.read_file(shapefile)
+    if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+        gdf = gdf.to_crs(epsg=4326)
+    gdf = gdf[["ADM2_PCODE", "ADM2_EN", "geometry"]].sort_values("ADM2_PCODE").reset_index(drop=True)
+
+    os.makedirs(out_dir, exist_ok=True)
+    for level, tolerance in TOLERANCES.items():
+        simplified = gpd.GeoDataFrame(gdf[["ADM2_PCODE", "ADM2_EN"]], geometry=_simplify(gdf.geometry, tolerance), crs=gdf.crs)
+        simplified.index = simplified["ADM2_PCODE"]
+        with open(_geojson_path(level), "w") as f:
+            f.write(simplified.to_json())
+
+    centroids = gdf.geometry.representative_point()
+    table = pd.DataFrame({
+        "ADM2_PCODE": gdf["ADM2_PCODE"],
+        "ADM2_EN": gdf["ADM2_EN"],
+        "lon": centroids.x,
+        "lat": centroids.y,
+    })
+    table.to_parquet(os.path.join(out_dir, os.path.basename(DISTRICT_TABLE)), index=False)
+
+    with open(os.path.join(out_dir, os.path.basename(GEO_META)), "w") as f:
+        json.dump({"source": shapefile, "fingerprint": source_fingerprint(shapefile), "tolerances": TOLERANCES}, f)
+
+
+def ensure_geo_assets(shapefile=SHAPEFILE):
+    """Build the assets if they are missing or the shapefile changed."""
+    try:
+        with open(GEO_META) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        meta = {}
+    if meta.get("fingerprint") != source_fingerprint(shapefile) or meta.get("tolerances") != TOLERANCES:
+        build_geo_assets(shapefile)
+        _loaded.clear()
+
+
+def load_geojson(level=DEFAULT_LEVEL):
+    """GeoJSON FeatureCollection dict for ``level``; shared, do not modify."""
+    with _lock:
+        ensure_geo_assets()
+        key = ("geojson", level)
+        if key not in _loaded:
+            with timed("geo.load_geojson"), open(_geojson_path(level)) as f:
+                _loaded[key] = json.load(f)
+        return _loaded[key]
+
+
+def load_district_table():
+    """ADM2_PCODE, ADM2_EN and label point (lon/lat) per district, ordered by PCODE."""
+    with _lock:
+        ensure_geo_assets()
+        if "districts" not in _loaded:
+            _loaded["districts"] = pd.read_parquet(DISTRICT_TABLE)
+        return _loaded["districts"]
@@ -0,0 +1,120 @@
+"""Append-only ingestion of new rainfall rows.
+
+A batch is validated against the store, appended to the CSV and the Parquet
+store, and then propagated incrementally: feature rows are computed from each
+affected district's trailing window only, the rollup cube gets the new cells
+added, and forecast cache entries of the affected districts are dropped. The
+district index and the clusters are rebuilt lazily from the updated store.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.data_store import append_rows, data_version, load_rainfall
+from utils.district_index import load_index
+from utils.features import HISTORY_ROWS, StreamingFeatureBuilder, month_climatology
+from utils.forecast_cache import ForecastCache
+from utils.rollups import add_rows, load_cube, save_cube
+
+FEATURE_TABLE = "data/rainfall_features.csv"
+# Dekadal rows start on these days; monthly rows use the 1st
+VALID_DAYS = (1, 11, 21)
+
+
+def read_batch(path):
+    """Read a batch file (CSV in the HDX layout, or Parquet) as date, ADM2_PCODE, rfh."""
+    if path.endswith(".parquet"):
+        batch = pd.read_parquet(path)
+    else:
+        batch = pd.read_csv(path, dtype={"ADM2_PCODE": str}, low_memory=False)
+    missing = [col for col in ("date", "ADM2_PCODE", "rfh") if col not in batch.columns]
+    if missing:
+        raise ValueError(f"Batch is missing column(s): {', '.join(missing)}")
+    batch = batch[~batch["date"].astype(str).str.startswith("#")]
+    return batch[["date", "ADM2_PCODE", "rfh"]].reset_index(drop=True)
+
+
+def validate_batch(batch, store, index):
+    """Parsed batch rows and a list of problems (empty when the batch can be appended)."""
+    rows = batch.copy()
+    rows["ADM2_PCODE"] = rows["ADM2_PCODE"].astype(str).str.strip()
+    rows["date"] = pd.to_datetime(batch["date"], errors="coerce")
+    rows["rfh"] = pd.to_numeric(batch["rfh"], errors="coerce")
+    errors = []
+
+    def check(bad, message):
+        if bad.any():
+            lines = (np.flatnonzero(bad.to_numpy()) + 1)[:5].tolist()
+            errors.append(f"{int(bad.sum())} row(s) {message} (e.g. rows {lines})")
+
+    check(rows["date"].isna(), "have an unparseable date")
+    check(rows["date"].notna() & ~rows["date"].dt.day.isin(VALID_DAYS), f"are not on a dekad start day {VALID_DAYS}")
+    check(rows["rfh"].isna(), "have a missing or non-numeric rfh")
+    check(rows["rfh"] < 0, "have negative rainfall")
+    known = set(store["ADM2_PCODE"].cat.categories)
+    check(~rows["ADM2_PCODE"].isin(known), "have an unknown ADM2_PCODE")
+    check(rows.duplicated(["ADM2_PCODE", "date"], keep=False), "are duplicated within the batch")
+
+    # Append-only: every row must be newer than its district's last stored date
+    last = pd.Series(store["date"].to_numpy()[index.stops - 1], index=index.pcodes)
+    check(rows["date"] <= rows["ADM2_PCODE"].map(last), "are not newer than the district's stored history")
+    return rows.sort_values(["ADM2_PCODE", "date"], kind="mergesort").reset_index(drop=True), errors
+
+
+def feature_rows(store, index, rows):
+    """Feature rows for ``rows`` from the trailing windows of their districts in ``store``.
+
+    ``store`` is the history before the batch. Each district's
+    ``month_avg_rfh`` includes the new rows, as a full rebuild would.
+    """
+    store_rfh = store["rfh"].to_numpy(dtype=np.float64)
+    store_month = store["month"].to_numpy(dtype=np.int64)
+    month_avg, carry = {}, {}
+    for code, new in rows.groupby("ADM2_PCODE", sort=False):
+        rfh, month = store_rfh[index.rows(code)], store_month[index.rows(code)]
+        observed = ~np.isnan(rfh)
+        rfh = np.concatenate([rfh[observed], new["rfh"].to_numpy(dtype=np.float64)])
+        month = np.concatenate([month[observed], new["date"].dt.month.to_numpy()])
+        month_avg[code] = month_climatology(np.zeros(len(rfh)), month, rfh, 1)[0]
+        carry[code] = rfh[:observed.sum()][-HISTORY_ROWS:].copy()
+
+    builder = StreamingFeatureBuilder(month_avg)
+    builder.carry = carry
+    return builder.transform(rows)
+
+
+def check_batch(batch):
+    """Problems that would make ``ingest`` reject ``batch`` (for dry runs)."""
+    return validate_batch(batch, load_rainfall(), load_index())[1]
+
+
+def ingest(batch, feature_table=FEATURE_TABLE, forecast_cache=None):
+    """Validate and append ``batch``; returns a summary dict. Raises ValueError on invalid batches."""
+    store = load_rainfall()
+    index = load_index()
+    rows, errors = validate_batch(batch, store, index)
+    if errors:
+        raise ValueError("Batch rejected:\n- " + "\n- ".join(errors))
+    if rows.empty:
+        return {"rows": 0, "districts": 0}
+
+    cube = load_cube()
+    features = feature_rows(store, index, rows) if os.path.exists(feature_table) else None
+
+    append_rows(rows)
+    save_cube(add_rows(cube, rows.assign(year=rows["date"].dt.year, month=rows["date"].dt.month)), data_version())
+    if features is not None:
+        features.to_csv(feature_table, mode="a", header=False, index=False)
+
+    forecast_cache = ForecastCache() if forecast_cache is None else forecast_cache
+    districts = sorted(rows["ADM2_PCODE"].unique())
+    for pcode in districts:
+        forecast_cache.invalidate(pcode)
+    return {
+        "rows": len(rows),
+        "districts": len(districts),
+        "first_date": f"{rows['date'].min():%Y-%m-%d}",
+        "last_date": f"{rows['date'].max():%Y-%m-%d}",
+        "feature_rows": None if features is None else len(features),
+    }
@@ -0,0 +1,151 @@
+"""Lightweight timing, memory and cache counters for the dashboard.
+
+``timed`` works as a context manager or decorator and records the wall time
+and resident memory of a stage; ``track_cache`` wraps ``st.cache_data`` /
+``st.cache_resource`` loaders and counts hits and misses. Totals are kept per
+process and shown by ``debug_panel`` when ``RAINFALL_DEBUG=1`` is set or the
+page is opened with ``?debug=1``. Set ``RAINFALL_METRICS_LOG`` to a file path
+to also append every event to it as JSON lines.
+"""
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import ContextDecorator
+
+METRICS_LOG = os.environ.get("RAINFALL_METRICS_LOG")
+DEBUG = os.environ.get("RAINFALL_DEBUG") == "1"
+
+_lock = threading.Lock()
+_stages = defaultdict(lambda: {'count': 0, 'total_s': 0.0, 'max_s': 0.0, 'rss_delta_mb': 0.0})
+_caches = defaultdict(lambda: {'calls': 0, 'misses': 0})
+_local = threading.local()
+
+
+def rss_mb():
+    """Current resident set size (peak RSS where /proc is not available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _emit(event):
+    if not METRICS_LOG:
+        return
+    event['ts'] = time.time()
+    event['pid'] = os.getpid()
+    line = json.dumps(event) + "\n"
+    with _lock:
+        with open(METRICS_LOG, "a") as f:
+            f.write(line)
+
+
+class timed(ContextDecorator):
+    """Record the duration and RSS change of a stage: ``with timed("models.load"):``."""
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def _recreate_cm(self):
+        # Used as a decorator, each call gets its own timer so overlapping calls don't share _start/_rss
+        return timed(self.stage)
+
+    def __enter__(self):
+        self._rss = rss_mb()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self._start
+        rss = rss_mb()
+        with _lock:
+            stats = _stages[self.stage]
+            stats['count'] += 1
+            stats['total_s'] += seconds
+            stats['max_s'] = max(stats['max_s'], seconds)
+            stats['rss_delta_mb'] += rss - self._rss
+        _emit({'type': 'stage', 'stage': self.stage, 'seconds': seconds, 'rss_mb': rss,
+               'rss_delta_mb': rss - self._rss, 'error': exc[0].__name__ if exc[0] else None})
+        return False
+
+
+def track_cache(cache, name=None, **cache_kwargs):
+    """Decorate a loader with ``cache`` (e.g. ``st.cache_data``) and count hits/misses.
+
+    Streamlit only runs the function body on a miss, so a call is a hit when
+    no body ran on this thread while it was being served.
+    """
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def on_miss(*args, **kwargs):
+            _local.misses = getattr(_local, 'misses', 0) + 1
+            with timed(f"cache.{label}"):
+                return func(*args, **kwargs)
+
+        cached = cache(**cache_kwargs)(on_miss)
+
+        @functools.wraps(func)
+        def call(*args, **kwargs):
+            before = getattr(_local, 'misses', 0)
+            result = cached(*args, **kwargs)
+            count(label, hit=getattr(_local, 'misses', 0) == before)
+            return result
+
+        call.clear = cached.clear
+        return call
+    return decorate
+
+
+def count(counter, hit):
+    """Record one hit or miss of a hand-rolled cache (e.g. the forecast cache)."""
+    with _lock:
+        _caches[counter]['calls'] += 1
+        _caches[counter]['misses'] += 0 if hit else 1
+    _emit({'type': 'cache', 'cache': counter, 'hit': bool(hit)})
+
+
+def snapshot():
+    """Copy of the per-stage timings and per-cache counters."""
+    with _lock:
+        stages = {name: dict(stats) for name, stats in _stages.items()}
+        caches = {
+            name: dict(stats, hits=stats['calls'] - stats['misses'])
+            for name, stats in _caches.items()
+        }
+    return {'stages': stages, 'caches': caches, 'rss_mb': rss_mb()}
+
+
+def debug_enabled():
+    if DEBUG:
+        return True
+    import streamlit as st
+
+    return st.query_params.get("debug") == "1"
+
+
+def debug_panel():
+    """Sidebar table of stage timings and cache counters, when debugging is on."""
+    if not debug_enabled():
+        return
+    import pandas as pd
+    import streamlit as st
+
+    data = snapshot()
+    with st.sidebar.expander("🛠️ Performance (this process)", expanded=False):
+        st.caption(f"RSS: {data['rss_mb']:.0f} MB")
+        if data['stages']:
+            stages = pd.DataFrame.from_dict(data['stages'], orient='index')
+            stages['mean_ms'] = stages['total_s'] / stages['count'] * 1000
+            st.dataframe(stages[['count', 'mean_ms', 'max_s', 'total_s', 'rss_delta_mb']].round(3), use_container_width=True)
+        if data['caches']:
+            st.dataframe(pd.DataFrame.from_dict(data['caches'], orient='index')[['calls', 'hits', 'misses']],
+                         use_container_width=True)
@@ -0,0 +1,139 @@
+"""Pickle-free model artifacts that load quickly.
+
+``export_model`` writes each feature model in a compact format next to its
+pickle:
+
+* XGBoost as the booster's UBJSON (``xgb_model.ubj``)
+* LightGBM as the booster's native text model (``lgbm_model.txt``)
+* Random Forest as flat node arrays (``rf_model.npy`` and
+  ``rf_model.splits.npy``), memory-mapped on load, plus a JSON sidecar with
+  the feature names and tree roots
+
+``load_artifact`` opens any of these, or a pickle, based on its extension. The
+booster objects and ``FlatForest`` are what ``Predictor`` receives, so the
+prediction path does not depend on the format.
+"""
+import json
+import os
+
+import joblib
+import numpy as np
+
+COMPACT_FILES = {
+    "XGBoost": "xgb_model.ubj",
+    "LightGBM": "lgbm_model.txt",
+    "Random Forest": "rf_model.npy",
+}
+ROW_BLOCK = 8192
+
+
+def _sidecar(path, suffix=".json"):
+    return os.path.splitext(path)[0] + suffix
+
+
+class FlatForest:
+    """Random Forest regressor over flat node arrays, traversed in NumPy.
+
+    Nodes of all trees are laid out back to back. ``children`` holds the
+    int32 rows (left, right, feature) and ``splits`` the float64 rows
+    (threshold, value); each row is contiguous, so lookups stay fast on a
+    memory map. Leaves point at themselves with an infinite threshold, so a
+    row that reached its leaf stays there for the remaining steps.
+    """
+
+    def __init__(self, children, splits, roots, features, max_depth):
+        # Plain ndarray views of the maps: np.memmap indexing goes through Python
+        self.children = np.asarray(children)
+        self.splits = np.asarray(splits)
+        self.roots = np.asarray(roots, dtype=np.int64)
+        self.features = list(features)
+        self.max_depth = int(max_depth)
+
+    @classmethod
+    def from_sklearn(cls, model, features):
+        trees = [est.tree_ for est in model.estimators_]
+        n_nodes = sum(tree.node_count for tree in trees)
+        children = np.empty((3, n_nodes), dtype=np.int32)
+        splits = np.empty((2, n_nodes), dtype=np.float64)
+        roots, offset = [], 0
+        for tree in trees:
+            end = offset + tree.node_count
+            ids = np.arange(tree.node_count)
+            leaf = tree.children_left == -1
+            children[0, offset:end] = np.where(leaf, ids, tree.children_left) + offset
+            children[1, offset:end] = np.where(leaf, ids, tree.children_right) + offset
+            children[2, offset:end] = np.where(leaf, 0, tree.feature)
+            splits[0, offset:end] = np.where(leaf, np.inf, tree.threshold)
+            splits[1, offset:end] = tree.value[:, 0, 0]
+            roots.append(offset)
+            offset = end
+        return cls(children, splits, roots, features, max(tree.max_depth for tree in trees))
+
+    def save(self, path):
+        np.save(path, self.children)
+        np.save(_sidecar(path, ".splits.npy"), self.splits)
+        with open(_sidecar(path), "w") as f:
+            json.dump({'features': self.features, 'roots': self.roots.tolist(), 'max_depth': self.max_depth}, f)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        with open(_sidecar(path)) as f:
+            meta = json.load(f)
+        return cls(np.load(path, mmap_mode=mmap_mode), np.load(_sidecar(path, ".splits.npy"), mmap_mode=mmap_mode),
+                   meta['roots'], meta['features'], meta['max_depth'])
+
+    def predict(self, X):
+        """Mean of the trees' leaf values; splits compare like scikit-learn (``x <= threshold``)."""
+        X = np.ascontiguousarray(X)
+        left, right, feature = self.children
+        threshold, value = self.splits
+        out = np.empty(X.shape[0])
+        for lo in range(0, X.shape[0], ROW_BLOCK):
+            block = X[lo:lo + ROW_BLOCK]
+            flat = block.ravel()
+            base = (np.arange(block.shape[0]) * block.shape[1])[:, None]
+            node = np.broadcast_to(self.roots, (block.shape[0], len(self.roots)))
+            for _ in range(self.max_depth):
+                go_left = flat[base + feature[node]] <= threshold[node]
+                node = np.where(go_left, left[node], right[node])
+            # Accumulate tree by tree, in the same order as the per-tree predict
+            values = value[node]
+            total = np.zeros(block.shape[0])
+            for t in range(values.shape[1]):
+                total += values[:, t]
+            out[lo:lo + ROW_BLOCK] = total / values.shape[1]
+        return out
+
+
+def export_model(name, model, directory, features):
+    """Write ``model`` in its compact format under ``directory``; returns the path."""
+    path = os.path.join(directory, COMPACT_FILES[name])
+    tmp_path = path + ".tmp" + os.path.splitext(path)[1]
+    if name == "XGBoost":
+        model.get_booster().save_model(tmp_path)
+    elif name == "LightGBM":
+        model.booster_.save_model(tmp_path)
+    else:
+        forest = FlatForest.from_sklearn(model, features)
+        forest.save(tmp_path)
+        for suffix in (".splits.npy", ".json"):
+            os.replace(_sidecar(tmp_path, suffix), _sidecar(path, suffix))
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_artifact(path):
+    """Model stored at ``path``, in the format given by its extension."""
+    if path.endswith(".ubj"):
+        import xgboost
+
+        booster = xgboost.Booster()
+        booster.load_model(path)
+        return booster
+    if path.endswith(".txt"):
+        import lightgbm
+
+        return lightgbm.Booster(model_file=path)
+    if path.endswith(".npy"):
+        return FlatForest.load(path)
+    return joblib.load(path)
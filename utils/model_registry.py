@@ -0,0 +1,118 @@
+"""Process-wide registry of the model artifacts in ``model/``.
+
+Retrained models live in version directories under ``model/versions`` (see
+``train_models.py``). When ``model/CURRENT`` names one, its artifacts are
+used and models it does not contain fall back to the shipped pickles.
+In each directory the compact format written by ``export_models.py`` is
+preferred over the pickle when both exist.
+Artifacts are unpickled on first use only, several requested models are
+loaded concurrently in a thread pool, and loaded instances are shared by
+every page and session in the process. A file that changes on disk is
+reloaded on its next use.
+"""
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.instrumentation import timed
+from utils.model_formats import COMPACT_FILES, load_artifact
+from utils.predictors import Predictor
+
+MODEL_DIR = "model"
+MODEL_FILES = {
+    "XGBoost": "xgb_model.pkl",
+    "Random Forest": "rf_model.pkl",
+    "LightGBM": "lgbm_model.pkl",
+    "Prophet": "prophet_model.pkl"
+}
+VERSIONS_DIR = os.path.join(MODEL_DIR, "versions")
+CURRENT_FILE = os.path.join(MODEL_DIR, "CURRENT")
+# Per-district models: a directory with one parameter file per ADM2_PCODE
+DISTRICT_MODELS = {"SARIMA": "sarima"}
+# Models that take the engineered feature matrix (usable by the recursive forecast)
+FEATURE_MODELS = ["XGBoost", "Random Forest", "LightGBM"]
+
+_lock = threading.Lock()
+_name_locks = defaultdict(threading.Lock)
+_models = {}
+_predictors = {}
+
+
+def active_version():
+    """Name of the promoted model version, or None for the shipped pickles."""
+    try:
+        with open(CURRENT_FILE) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def version_dir(version=None):
+    version = active_version() if version is None else version
+    return None if version is None else os.path.join(VERSIONS_DIR, version)
+
+
+def model_path(name):
+    """Artifact of ``name`` in the promoted version, else the shipped one (compact first)."""
+    directory = version_dir()
+    if name in DISTRICT_MODELS:
+        return os.path.join(directory or MODEL_DIR, DISTRICT_MODELS[name])
+    for candidate in ([directory] if directory is not None else []) + [MODEL_DIR]:
+        for filename in (COMPACT_FILES.get(name), MODEL_FILES[name]):
+            if filename and os.path.exists(os.path.join(candidate, filename)):
+                return os.path.join(candidate, filename)
+    return os.path.join(MODEL_DIR, MODEL_FILES[name])
+
+
+def district_model_path(name, pcode):
+    return os.path.join(model_path(name), f"{pcode}.json")
+
+
+def available_models(names=None):
+    """Names whose artifact exists, without loading anything."""
+    names = list(MODEL_FILES) if names is None else names
+    known = set(MODEL_FILES) | set(DISTRICT_MODELS)
+    return [name for name in names if name in known and os.path.exists(model_path(name))]
+
+
+def _version(name):
+    path = model_path(name)
+    return path, os.stat(path).st_mtime_ns
+
+
+def get_model(name):
+    """Loaded model for ``name``; concurrent callers for one name share a single load."""
+    with _lock:
+        name_lock = _name_locks[name]
+    with name_lock:
+        version = _version(name)
+        cached = _models.get(name)
+        if cached is None or cached[0] != version:
+            with timed(f"models.load.{name}"):
+                _models[name] = (version, load_artifact(version[0]))
+            _predictors.pop(name, None)
+        return _models[name][1]
+
+
+def get_predictor(name):
+    model = get_model(name)
+    with _lock:
+        if name not in _predictors or _predictors[name].model is not model:
+            _predictors[name] = Predictor(model)
+        return _predictors[name]
+
+
+def load_many(names, loader=get_model, max_workers=4):
+    """Load ``names`` concurrently; returns (loaded dict, {name: exception})."""
+    loaded, errors = {}, {}
+    if not names:
+        return loaded, errors
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(names))) as pool:
+        futures = {name: pool.submit(loader, name) for name in names}
+    for name, future in futures.items():
+        try:
+            loaded[name] = future.result()
+        except Exception as e:
+            errors[name] = e
+    return loaded, errors
@@ -0,0 +1,116 @@
+"""Plotly figures for the model evaluation views that stay light on big test sets.
+
+Up to ``WEBGL_THRESHOLD`` points the figures are drawn as before (SVG). Above
+it, index series are reduced with Largest-Triangle-Three-Buckets and drawn as
+WebGL lines, and scatter plots become a binned density drawn as WebGL
+markers, so the payload is bounded no matter how many rows are evaluated.
+"""
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+WEBGL_THRESHOLD = 5000
+LTTB_POINTS = 2000
+DENSITY_BINS = 120
+
+
+def lttb(x, y, n_out=LTTB_POINTS):
+    """Indices of ``n_out`` points that keep the visual shape of (x, y)."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def binned_density(x, y, bins=DENSITY_BINS):
+    """Centres and counts of the non-empty cells of a 2-D histogram."""
+    counts, xedges, yedges = np.histogram2d(x, y, bins=bins)
+    ix, iy = np.nonzero(counts)
+    xc = (xedges[ix] + xedges[ix + 1]) / 2
+    yc = (yedges[iy] + yedges[iy + 1]) / 2
+    return xc, yc, counts[ix, iy]
+
+
+def ols_line(x, y):
+    """End points of the least-squares line through (x, y)."""
+    slope, intercept = np.polyfit(np.asarray(x, dtype=float), np.asarray(y, dtype=float), 1)
+    xs = np.array([np.min(x), np.max(x)])
+    return xs, slope * xs + intercept
+
+
+def _density_trace(x, y, colorscale, colorbar_title):
+    xc, yc, counts = binned_density(x, y)
+    return go.Scattergl(
+        x=xc, y=yc, mode='markers', name='Density',
+        marker=dict(color=np.log10(counts + 1), colorscale=colorscale, size=6, symbol='square',
+                    colorbar=dict(title=colorbar_title)),
+        customdata=counts, hovertemplate="%{customdata:.0f} points<extra></extra>",
+    )
+
+
+def actual_vs_predicted(y_true, y_pred, title):
+    y_true, y_pred = np.asarray(y_true, dtype=float), np.asarray(y_pred, dtype=float)
+    if len(y_true) <= WEBGL_THRESHOLD:
+        fig = px.scatter(
+            x=y_true, y=y_pred,
+            labels={'x': 'Actual Rainfall (mm)', 'y': 'Predicted Rainfall (mm)'},
+            title=title, color_discrete_sequence=["#3498db"]
+        )
+    else:
+        fig = go.Figure(_density_trace(y_true, y_pred, "Blues", "log10 count"))
+        fig.update_layout(title=title, xaxis_title='Actual Rainfall (mm)', yaxis_title='Predicted Rainfall (mm)')
+    xs, ys = ols_line(y_true, y_pred)
+    fig.add_scatter(x=xs, y=ys, mode='lines', name='OLS trend', line=dict(color="#2c3e50"))
+    fig.add_scatter(x=[min(y_true), max(y_true)], y=[min(y_true), max(y_true)],
+                    mode='lines', name='Ideal', line=dict(color='red', dash='dash'))
+    return fig
+
+
+def actual_vs_predicted_series(y_true, y_pred, title):
+    y_true, y_pred = np.asarray(y_true, dtype=float), np.asarray(y_pred, dtype=float)
+    idx = np.arange(len(y_true))
+    if len(y_true) <= WEBGL_THRESHOLD:
+        return px.bar(
+            x=idx,
+            y=[y_true, y_pred],
+            labels={'x': 'Index', 'value': 'Rainfall (mm)', 'variable': 'Type'},
+            title=title
+        )
+    fig = go.Figure()
+    for name, values in (("Actual", y_true), ("Predicted", y_pred)):
+        keep = lttb(idx, values)
+        fig.add_trace(go.Scattergl(x=idx[keep], y=values[keep], mode='lines', name=name))
+    fig.update_layout(title=f"{title} · {LTTB_POINTS} of {len(idx)} points (LTTB)",
+                      xaxis_title='Index', yaxis_title='Rainfall (mm)')
+    return fig
+
+
+def residuals(y_true, y_pred, title):
+    y_true, y_pred = np.asarray(y_true, dtype=float), np.asarray(y_pred, dtype=float)
+    resid = y_true - y_pred
+    if len(y_true) <= WEBGL_THRESHOLD:
+        return px.scatter(
+            x=y_true, y=resid,
+            labels={'x': 'Actual Rainfall (mm)', 'y': 'Residuals (mm)'},
+            title=title,
+            color=resid, color_continuous_scale="RdBu",
+            size=np.abs(resid), size_max=15
+        )
+    fig = go.Figure(_density_trace(y_true, resid, "RdBu", "log10 count"))
+    fig.update_layout(title=title, xaxis_title='Actual Rainfall (mm)', yaxis_title='Residuals (mm)')
+    return fig
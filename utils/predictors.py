@@ -0,0 +1,108 @@
+"""Prediction adapters that feed NumPy arrays straight to the native estimators.
+
+The feature order of a model is resolved once when the adapter is built.
+After that, ``predict`` takes a contiguous matrix in that order and calls
+XGBoost's ``inplace_predict``, LightGBM's booster or the Random Forest trees
+directly, with no DataFrame construction or per-call validation.
+
+Compact artifacts (see ``utils.model_formats``) load as a bare XGBoost or
+LightGBM booster or as a ``FlatForest`` and take the same paths.
+
+XGBoost and scikit-learn trees split on float32 values, so they get float32
+input. LightGBM compares in float64, and rounding its input to float32 changes
+which side of a threshold some rows fall on, so it keeps float64.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.features import MODEL_FEATURES
+
+
+def model_kind(model):
+    """Estimator class name, with bare boosters told apart by their library."""
+    kind = type(model).__name__
+    if kind == 'Booster':
+        return 'LGBMBooster' if type(model).__module__.startswith('lightgbm') else 'XGBBooster'
+    return kind
+
+
+def resolve_features(model):
+    """Feature names in the order ``model`` expects them."""
+    kind = model_kind(model)
+    if hasattr(model, 'feature_names_in_'):
+        return [str(f) for f in model.feature_names_in_]
+    if kind == 'FlatForest':
+        return list(model.features)
+    if kind == 'LGBMBooster' and not model.feature_name()[0].startswith('Column_'):
+        return list(model.feature_name())
+    if hasattr(model, 'get_booster') or kind == 'XGBBooster':
+        booster = model.get_booster() if hasattr(model, 'get_booster') else model
+        if booster.feature_names:
+            return list(booster.feature_names)
+    # Shipped models without stored names were fitted on the test_data.csv column order
+    return list(MODEL_FEATURES)
+
+
+def _xgboost_predict(model):
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    try:
+        iteration_range = (0, model.best_iteration + 1)
+    except AttributeError:
+        iteration_range = (0, 0)
+    return lambda X: booster.inplace_predict(X, iteration_range=iteration_range)
+
+
+def _lightgbm_predict(model):
+    booster = getattr(model, 'booster_', model)
+    return lambda X: booster.predict(X)
+
+
+def _forest_predict(model):
+    trees = [est.tree_ for est in model.estimators_]
+
+    def predict(X):
+        total = np.zeros(X.shape[0])
+        for tree in trees:
+            total += tree.predict(X)[:, 0]
+        return total / len(trees)
+    return predict
+
+
+class Predictor:
+    """Wraps a fitted model with a fixed feature order and a native predict path."""
+
+    def __init__(self, model):
+        self.model = model
+        self.features = resolve_features(model)
+        self.kind = model_kind(model)
+        self.dtype = np.float64 if self.kind in ('LGBMRegressor', 'LGBMBooster') else np.float32
+        self._predict = self._native_predict(model)
+
+    def _native_predict(self, model):
+        if self.kind in ('XGBRegressor', 'XGBBooster'):
+            return _xgboost_predict(model)
+        if self.kind in ('LGBMRegressor', 'LGBMBooster'):
+            return _lightgbm_predict(model)
+        if self.kind == 'RandomForestRegressor':
+            return _forest_predict(model)
+        if self.kind == 'FlatForest':
+            return model.predict
+        return lambda X: self.model.predict(pd.DataFrame(X, columns=self.features))
+
+    def predict(self, X):
+        """Predict from a (rows x features) array in ``self.features`` order."""
+        X = np.ascontiguousarray(X, dtype=self.dtype)
+        return np.asarray(self._predict(X), dtype=np.float64).reshape(-1)
+
+    def matrix(self, columns):
+        """Stack ``columns`` (name -> 1-D array) in feature order; missing ones are 0."""
+        n = len(next(iter(columns.values())))
+        X = np.zeros((n, len(self.features)), dtype=self.dtype)
+        for j, name in enumerate(self.features):
+            if name in columns:
+                X[:, j] = columns[name]
+        return X
+
+    def predict_frame(self, df):
+        """Predict from a DataFrame, aligning its columns to the model once."""
+        return self.predict(self.matrix({col: df[col].to_numpy() for col in df.columns}))
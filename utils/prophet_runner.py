@@ -0,0 +1,147 @@
+"""Precomputed Prophet forecasts.
+
+Prophet's ``predict`` costs tens of milliseconds per call, so it is kept off
+the request path. The shipped (national) model is run once per artifact over
+its history and the 2025–2035 horizon, and the frame is stored under
+``data/cache/prophet``; the Models and Forecast pages read from it.
+Per-district models are fitted in a process pool by ``run_prophet.py`` and
+written to the shared ``ForecastCache``.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
+import pandas as pd
+
+from utils.data_store import CACHE_DIR
+from utils.forecast_cache import ForecastCache, file_hash, history_hash
+from utils.forecast_engine import FORECAST_DATES
+from utils.model_registry import model_path
+
+PROPHET_DIR = os.path.join(CACHE_DIR, "prophet")
+FRAME_COLUMNS = ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+# Settings of the per-district fits; part of their cache key
+DISTRICT_SETTINGS = {"yearly_seasonality": True, "weekly_seasonality": False, "daily_seasonality": False}
+
+_lock = threading.Lock()
+_frames = {}
+
+
+def _frame_path(digest):
+    return os.path.join(PROPHET_DIR, f"prophet_{digest[:16]}.parquet")
+
+
+def forecast_dates(model, future_dates=FORECAST_DATES, extra_dates=None):
+    """Monthly dates from the start of the model's history to the end of the horizon."""
+    dates = pd.date_range(model.history['ds'].min(), future_dates[-1], freq="MS")
+    if extra_dates is not None:
+        dates = dates.union(pd.DatetimeIndex(pd.to_datetime(extra_dates)).dropna())
+    return dates
+
+
+def build_forecast_frame(model, future_dates=FORECAST_DATES, extra_dates=None):
+    forecast = model.predict(pd.DataFrame({'ds': forecast_dates(model, future_dates, extra_dates)}))
+    return forecast[FRAME_COLUMNS].reset_index(drop=True)
+
+
+def artifact_forecast(name="Prophet", extra_dates=None, future_dates=FORECAST_DATES):
+    """Forecast frame (ds, yhat, yhat_lower, yhat_upper) of a Prophet artifact.
+
+    Computed once per artifact hash and persisted; it is only rebuilt when the
+    artifact changes or ``extra_dates`` asks for dates it does not cover.
+    """
+    digest = file_hash(model_path(name))
+    path = _frame_path(digest)
+    with _lock:
+        frame = _frames.get(digest)
+        if frame is None and os.path.exists(path):
+            frame = pd.read_parquet(path)
+        wanted = pd.DatetimeIndex([future_dates[-1]])
+        if extra_dates is not None:
+            wanted = wanted.union(pd.DatetimeIndex(pd.to_datetime(extra_dates)).dropna())
+        if frame is None or not wanted.isin(frame['ds']).all():
+            model = joblib.load(model_path(name))
+            covered = None if frame is None else frame['ds']
+            frame = build_forecast_frame(model, future_dates, wanted if covered is None else wanted.union(covered))
+            os.makedirs(PROPHET_DIR, exist_ok=True)
+            tmp_path = path + ".tmp"
+            frame.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        _frames.clear()
+        _frames[digest] = frame
+        return frame
+
+
+def predictions_for(frame, dates, column='yhat'):
+    """Values of ``column`` for ``dates`` from a cached forecast frame."""
+    values = frame.set_index('ds')[column].reindex(pd.to_datetime(dates))
+    if values.isna().any():
+        raise ValueError(f"Prophet forecast does not cover {int(values.isna().sum())} requested dates")
+    return values.to_numpy()
+
+
+def monthly_series(rows):
+    """Monthly mean rainfall of one district's store rows as Prophet's (ds, y)."""
+    rows = rows.dropna(subset=['rfh'])
+    y = rows.groupby(rows['date'].dt.to_period('M'))['rfh'].mean()
+    return pd.DataFrame({'ds': y.index.to_timestamp(), 'y': y.to_numpy(dtype=float)})
+
+
+def settings_hash():
+    return hashlib.sha256(json.dumps(DISTRICT_SETTINGS, sort_keys=True).encode()).hexdigest()
+
+
+def _fit_one(pcode, series, future_dates):
+    from prophet import Prophet
+
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    model = Prophet(**DISTRICT_SETTINGS).fit(series)
+    return pcode, model.predict(pd.DataFrame({'ds': future_dates}))['yhat'].to_numpy()
+
+
+def district_forecast(cache, pcode, data_hash, future_dates=FORECAST_DATES):
+    """Cached per-district Prophet forecast, or None if it was not fitted."""
+    return cache.get(pcode, "Prophet", settings_hash(), data_hash, future_dates)
+
+
+def fit_districts(history, index, districts=None, future_dates=FORECAST_DATES, workers=1, cache=None, progress=None):
+    """Fit one Prophet model per district and store its forecast in ``cache``.
+
+    Districts whose forecast is already cached for the current history are
+    skipped. Returns (number fitted, {pcode: exception}).
+    """
+    cache = ForecastCache() if cache is None else cache
+    model_hash = settings_hash()
+    jobs = {}
+    for district in (index.districts if districts is None else districts):
+        pcode = index.pcode(district)
+        rows = index.slice(history, district)
+        data_hash = history_hash(rows)
+        if cache.get(pcode, "Prophet", model_hash, data_hash, future_dates) is None:
+            jobs[pcode] = (monthly_series(rows), data_hash)
+
+    def _store(pcode, values):
+        cache.put(pcode, "Prophet", model_hash, jobs[pcode][1], future_dates, values)
+        if progress is not None:
+            progress(pcode)
+
+    errors = {}
+    if workers <= 1:
+        for pcode, (series, _) in jobs.items():
+            try:
+                _store(*_fit_one(pcode, series, future_dates))
+            except Exception as e:
+                errors[pcode] = e
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_fit_one, pcode, series, future_dates): pcode for pcode, (series, _) in jobs.items()}
+            for future in as_completed(futures):
+                try:
+                    _store(*future.result())
+                except Exception as e:
+                    errors[futures[future]] = e
+    return len(jobs) - len(errors), errors
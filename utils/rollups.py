@@ -0,0 +1,132 @@
+"""Precomputed district x year x month rainfall aggregates.
+
+The cube holds the rainfall sum and row count of every (district, year, month)
+cell. Season and year totals are sums over month slices, so every slider state
+of the Visualizations page is answered by indexing instead of a groupby.
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.data_store import CACHE_DIR, data_version, load_rainfall
+from utils.instrumentation import timed
+
+CUBE_PATH = os.path.join(CACHE_DIR, "rollups.npz")
+
+SEASON_MONTHS = {
+    "Winter": [12, 1, 2],
+    "Summer": [3, 4, 5],
+    "Monsoon": [6, 7, 8, 9],
+    "Post-Monsoon": [10, 11],
+}
+SEASONS = ["All"] + list(SEASON_MONTHS)
+
+_lock = threading.Lock()
+_cubes = {}
+
+
+class RainfallCube:
+    def __init__(self, pcodes, years, sums, counts):
+        self.pcodes = pcodes
+        self.years = years
+        self.sums = sums
+        self.counts = counts
+        # (district, year, season) totals with "All" first, in SEASONS order
+        self.season_sums = np.stack(
+            [sums.sum(axis=2)] + [sums[:, :, np.array(m) - 1].sum(axis=2) for m in SEASON_MONTHS.values()],
+            axis=2,
+        )
+        self._year_pos = {int(y): i for i, y in enumerate(years)}
+
+    def district_totals(self, year, season="All"):
+        """Total rainfall per district (in ``pcodes`` order) for one year/season."""
+        return self.season_sums[:, self._year_pos[int(year)], SEASONS.index(season)]
+
+    def yearly_totals(self):
+        return pd.DataFrame({'year': self.years, 'rfh': self.sums.sum(axis=(0, 2))})
+
+    def seasonal_means(self):
+        """Mean rainfall per row for each (year, season), as in a groupby mean."""
+        frames = []
+        for season, months in SEASON_MONTHS.items():
+            idx = np.array(months) - 1
+            total = self.sums[:, :, idx].sum(axis=(0, 2))
+            count = self.counts[:, :, idx].sum(axis=(0, 2))
+            frame = pd.DataFrame({'year': self.years, 'season': season, 'total': total, 'count': count})
+            frames.append(frame[frame['count'] > 0])
+        out = pd.concat(frames, ignore_index=True)
+        out['rfh'] = out['total'] / out['count']
+        return out.sort_values(['year', 'season'], ignore_index=True)[['year', 'season', 'rfh']]
+
+    def monthly_climatology(self):
+        """Mean rainfall per (district, calendar month) over all years."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.sums.sum(axis=1) / self.counts.sum(axis=1)
+
+
+def build_cube(df):
+    """Aggregate the store frame; missing rainfall counts as 0 like the map view."""
+    districts = df['ADM2_PCODE'].astype('category')
+    pcodes = np.asarray(districts.cat.categories, dtype=str)
+    years = np.arange(int(df['year'].min()), int(df['year'].max()) + 1)
+
+    d = districts.cat.codes.to_numpy(dtype=np.int64)
+    y = df['year'].to_numpy(dtype=np.int64) - years[0]
+    m = df['month'].to_numpy(dtype=np.int64) - 1
+    flat = (d * len(years) + y) * 12 + m
+    size = len(pcodes) * len(years) * 12
+    shape = (len(pcodes), len(years), 12)
+
+    rfh = df['rfh'].fillna(0).to_numpy(dtype=np.float64)
+    sums = np.bincount(flat, weights=rfh, minlength=size).reshape(shape)
+    counts = np.bincount(flat, minlength=size).reshape(shape)
+    return RainfallCube(pcodes, years, sums, counts)
+
+
+def add_rows(cube, df):
+    """New cube with ``df`` (store rows of districts already in ``cube``) added to its cells."""
+    pcodes = df['ADM2_PCODE'].astype(str).to_numpy()
+    d = np.searchsorted(cube.pcodes, pcodes).clip(max=len(cube.pcodes) - 1)
+    if not (cube.pcodes[d] == pcodes).all():
+        raise ValueError("Rows contain districts that are not in the cube")
+    years = np.arange(min(int(cube.years[0]), int(df['year'].min())), max(int(cube.years[-1]), int(df['year'].max())) + 1)
+    offset = int(cube.years[0]) - int(years[0])
+
+    shape = (len(cube.pcodes), len(years), 12)
+    sums, counts = np.zeros(shape), np.zeros(shape, dtype=cube.counts.dtype)
+    sums[:, offset:offset + len(cube.years)] = cube.sums
+    counts[:, offset:offset + len(cube.years)] = cube.counts
+
+    cells = (d, df['year'].to_numpy(dtype=np.int64) - years[0], df['month'].to_numpy(dtype=np.int64) - 1)
+    np.add.at(sums, cells, df['rfh'].fillna(0).to_numpy(dtype=np.float64))
+    np.add.at(counts, cells, 1)
+    return RainfallCube(cube.pcodes, years, sums, counts)
+
+
+def load_cube(path=CUBE_PATH):
+    """Cube for the current data version, rebuilt and persisted when stale."""
+    version = data_version()
+    with _lock:
+        if version in _cubes:
+            return _cubes[version]
+        cube = None
+        if os.path.exists(path):
+            stored = np.load(path)
+            if str(stored['version']) == version:
+                cube = RainfallCube(stored['pcodes'], stored['years'], stored['sums'], stored['counts'])
+        if cube is None:
+            with timed("rollups.build_cube"):
+                cube = build_cube(load_rainfall())
+            save_cube(cube, version, path)
+        _cubes.clear()
+        _cubes[version] = cube
+        return cube
+
+
+def save_cube(cube, version, path=CUBE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, version=version, pcodes=cube.pcodes, years=cube.years, sums=cube.sums, counts=cube.counts)
+    os.replace(tmp_path, path)
@@ -0,0 +1,116 @@
+"""Per-district SARIMA models of monthly rainfall.
+
+Only the fitted parameters are stored, as one small JSON file per district.
+A forecast re-applies them to the district's current monthly series with the
+Kalman smoother, which takes a fraction of a second and picks up rows
+appended since training without refitting. Fits run in a process pool, and
+each district's file is written as soon as its fit finishes, so an
+interrupted run can resume from the districts that are still missing.
+"""
+import json
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from utils.forecast_engine import FORECAST_DATES
+from utils.prophet_runner import monthly_series
+
+SARIMA_ORDER = (1, 0, 1)
+SEASONAL_ORDER = (0, 1, 1, 12)
+
+
+def sarima_series(rows):
+    """Monthly mean rainfall of one district's store rows on a regular monthly index."""
+    return monthly_series(rows).set_index('ds')['y'].asfreq('MS')
+
+
+def _model(series, order, seasonal_order):
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    return SARIMAX(series, order=tuple(order), seasonal_order=tuple(seasonal_order))
+
+
+def fit_one(pcode, series, order=SARIMA_ORDER, seasonal_order=SEASONAL_ORDER):
+    """Fit one district; returns its spec (orders, parameters and fit statistics)."""
+    with warnings.catch_warnings():
+        # Non-convergence is recorded in the spec instead of printed per district
+        warnings.simplefilter("ignore")
+        result = _model(series, order, seasonal_order).fit(disp=False)
+    return {
+        'pcode': pcode,
+        'order': list(order),
+        'seasonal_order': list(seasonal_order),
+        'params': [float(p) for p in result.params],
+        'param_names': list(result.param_names),
+        'aic': float(result.aic),
+        'nobs': int(result.nobs),
+        'converged': bool(result.mle_retvals.get('converged', True)),
+        'last_date': f"{series.index[-1]:%Y-%m-%d}",
+    }
+
+
+def spec_path(directory, pcode):
+    return os.path.join(directory, f"{pcode}.json")
+
+
+def write_spec(directory, spec):
+    os.makedirs(directory, exist_ok=True)
+    path = spec_path(directory, spec['pcode'])
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(spec, f)
+    os.replace(tmp_path, path)
+
+
+def read_spec(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def forecast(spec, rows, future_dates=FORECAST_DATES):
+    """Forecast of one district for ``future_dates`` from its spec and current store rows."""
+    series = sarima_series(rows)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        result = _model(series, spec['order'], spec['seasonal_order']).smooth(np.asarray(spec['params']))
+        values = result.predict(start=future_dates[0], end=future_dates[-1])
+    return np.clip(values.reindex(pd.DatetimeIndex(future_dates)).to_numpy(dtype=np.float64), 0, None)
+
+
+def fit_districts(history, index, directory, districts=None, workers=1, progress=None):
+    """Fit a SARIMA model for every district without a spec in ``directory``.
+
+    ``progress`` is called with each finished spec. Returns
+    (number fitted, number already present, {pcode: exception}).
+    """
+    jobs = {}
+    for district in (index.districts if districts is None else districts):
+        pcode = index.pcode(district)
+        if not os.path.exists(spec_path(directory, pcode)):
+            jobs[pcode] = sarima_series(index.slice(history, district))
+    skipped = (len(index.districts) if districts is None else len(districts)) - len(jobs)
+
+    def _store(spec):
+        write_spec(directory, spec)
+        if progress is not None:
+            progress(spec)
+
+    errors = {}
+    if workers <= 1:
+        for pcode, series in jobs.items():
+            try:
+                _store(fit_one(pcode, series))
+            except Exception as e:
+                errors[pcode] = e
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(fit_one, pcode, series): pcode for pcode, series in jobs.items()}
+            for future in as_completed(futures):
+                try:
+                    _store(future.result())
+                except Exception as e:
+                    errors[futures[future]] = e
+    return len(jobs) - len(errors), skipped, errors
@@ -0,0 +1,118 @@
+"""Retraining of the dashboard's models from the shared feature table.
+
+The global XGBoost, LightGBM and Random Forest models are fitted on the
+feature rows of every district, holding out the last ``TEST_FRACTION`` of
+each district's rows to score them. Every run writes into its own
+``model/versions/<version>`` directory together with a ``manifest.json``.
+Artifacts that already exist there are kept, so re-running a version resumes
+it. ``promote`` points ``model/CURRENT`` at a version for the registry.
+"""
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+
+from utils.data_store import data_version
+from utils.evaluation import regression_metrics
+from utils.features import FEATURE_VERSION, MODEL_FEATURES
+from utils.model_registry import CURRENT_FILE, DISTRICT_MODELS, MODEL_FILES, VERSIONS_DIR, version_dir
+from utils.predictors import Predictor
+
+TEST_FRACTION = 0.2
+RANDOM_STATE = 42
+# Hyperparameters of the shipped pickles
+GLOBAL_PARAMS = {
+    "XGBoost": {"n_estimators": 200, "max_depth": 4, "learning_rate": 0.1, "subsample": 0.7,
+                "colsample_bytree": 0.7, "reg_alpha": 0.3, "reg_lambda": 2, "objective": "reg:squarederror"},
+    "LightGBM": {"n_estimators": 200, "max_depth": 5, "learning_rate": 0.1, "num_leaves": 31,
+                 "subsample": 0.7, "colsample_bytree": 0.7, "reg_alpha": 0.3, "reg_lambda": 2, "verbose": -1},
+    "Random Forest": {"n_estimators": 150, "max_depth": 6, "n_jobs": -1},
+}
+
+
+def new_version():
+    return time.strftime("%Y%m%d-%H%M%S")
+
+
+def estimator(name):
+    params = dict(GLOBAL_PARAMS[name], random_state=RANDOM_STATE)
+    if name == "XGBoost":
+        from xgboost import XGBRegressor
+        return XGBRegressor(**params)
+    if name == "LightGBM":
+        from lightgbm import LGBMRegressor
+        return LGBMRegressor(**params)
+    from sklearn.ensemble import RandomForestRegressor
+    return RandomForestRegressor(**params)
+
+
+def holdout_mask(table, test_fraction=TEST_FRACTION):
+    """True for the last ``test_fraction`` of each district's rows (the table is date-sorted per district)."""
+    position = table.groupby('ADM2_PCODE', observed=True).cumcount().to_numpy()
+    size = table.groupby('ADM2_PCODE', observed=True)['rfh'].transform('size').to_numpy()
+    return position >= size - np.ceil(size * test_fraction)
+
+
+def train_global(name, table, full=False):
+    """Fit ``name`` on the training rows; returns (model, holdout metrics).
+
+    With ``full`` the model is refitted on every row after it is scored.
+    """
+    X = table[MODEL_FEATURES].astype(np.float64)
+    y = table['rfh'].to_numpy(dtype=np.float64)
+    test = holdout_mask(table)
+    model = estimator(name).fit(X[~test], y[~test])
+    predictor = Predictor(model)
+    y_pred = predictor.predict(predictor.matrix({col: X[col].to_numpy()[test] for col in MODEL_FEATURES}))
+    metrics = regression_metrics(y[test], y_pred)
+    metrics.update(train_rows=int((~test).sum()), test_rows=int(test.sum()))
+    if full:
+        model = estimator(name).fit(X, y)
+    return model, metrics
+
+
+def save_model(model, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def artifact_path(version, name):
+    return os.path.join(version_dir(version), DISTRICT_MODELS.get(name) or MODEL_FILES[name])
+
+
+def read_manifest(version):
+    try:
+        with open(os.path.join(version_dir(version), "manifest.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"version": version, "models": {}}
+
+
+def write_manifest(version, manifest):
+    path = os.path.join(version_dir(version), "manifest.json")
+    manifest.update(version=version, feature_version=FEATURE_VERSION, data_version=data_version(),
+                    updated=time.strftime("%Y-%m-%dT%H:%M:%S"))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def list_versions():
+    if not os.path.isdir(VERSIONS_DIR):
+        return []
+    return sorted(entry.name for entry in os.scandir(VERSIONS_DIR) if entry.is_dir())
+
+
+def promote(version):
+    """Make the registry load ``version``'s artifacts."""
+    if not os.path.isdir(version_dir(version)):
+        raise ValueError(f"Unknown model version: {version}")
+    tmp_path = CURRENT_FILE + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(version + "\n")
+    os.replace(tmp_path, CURRENT_FILE)
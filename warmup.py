@@ -0,0 +1,83 @@
+import argparse
+import os
+import sys
+import time
+
+from utils.clustering import load_clusters
+from utils.data_store import load_rainfall, store_memory_report
+from utils.district_index import load_index
+from utils.evaluation import PROPHET_TEST_DATA, load_prophet_test_data
+from utils.forecast_batcher import ForecastBatcher
+from utils.geo_assets import TOLERANCES, load_district_table, load_geojson
+from utils.model_registry import FEATURE_MODELS, available_models, get_predictor, load_many
+from utils.prophet_runner import artifact_forecast
+from utils.rollups import load_cube
+
+failures = []
+
+
+def _fail(label, error):
+    failures.append(label)
+    print(f"⚠️ {label} failed: {error}", file=sys.stderr)
+
+
+def _step(label, func):
+    start = time.perf_counter()
+    try:
+        result = func()
+    except Exception as e:
+        _fail(label, e)
+        return None
+    print(f"✅ {label} ({time.perf_counter() - start:.2f}s)", file=sys.stderr)
+    return result
+
+
+def _prophet():
+    extra = load_prophet_test_data()['ds'] if os.path.exists(PROPHET_TEST_DATA) else None
+    return artifact_forecast("Prophet", extra_dates=extra)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build every on-disk cache the dashboard uses so new workers start hot.")
+    parser.add_argument("--districts", nargs="+", default=["Dhaka"], help="districts to pre-forecast")
+    parser.add_argument("--all-districts", action="store_true", help="pre-forecast every district")
+    parser.add_argument("--models", nargs="+", default=["LightGBM"], choices=FEATURE_MODELS,
+                        help="models to pre-forecast with")
+    parser.add_argument("--skip-prophet", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    history = _step("Rainfall store", load_rainfall)
+    if history is None:
+        sys.exit("❌ The rainfall store could not be built; nothing else can be warmed up.")
+    report = store_memory_report()
+    if report:
+        print(f"   {len(history)} rows, {report['bytes_after'] / 1e6:.1f} MB in memory "
+              f"({report['bytes_saved'] / 1e6:.1f} MB saved by the compact schema)", file=sys.stderr)
+
+    index = _step("District index", load_index)
+    _step("District table and GeoJSON", lambda: [load_district_table()] + [load_geojson(level) for level in TOLERANCES])
+    _step("Rollup cube", load_cube)
+    _step("District clusters", load_clusters)
+
+    # Only checks that every artifact loads: each Streamlit worker keeps its own registry
+    names = available_models()
+    loaded, errors = load_many([name for name in names if name in FEATURE_MODELS], loader=get_predictor)
+    for name in loaded:
+        print(f"✅ Model artifact {name} loads", file=sys.stderr)
+    for name, error in errors.items():
+        _fail(f"Model artifact {name}", error)
+    if not args.skip_prophet and "Prophet" in names:
+        _step("Prophet forecast frame", _prophet)
+
+    models = [name for name in args.models if name in available_models(FEATURE_MODELS)]
+    if index is not None and models:
+        districts = index.districts if args.all_districts else [d for d in args.districts if d in index]
+        batcher = ForecastBatcher(history, index=index)
+        _step(f"Forecasts for {len(districts)} district(s) x {', '.join(models)}",
+              lambda: batcher.forecast(districts, models))
+
+    if failures:
+        sys.exit(f"❌ Warm-up finished with {len(failures)} failed step(s): {', '.join(failures)}")
+    print(f"✅ Warm-up finished in {time.perf_counter() - start:.1f}s", file=sys.stderr)